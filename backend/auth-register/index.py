@@ -5,22 +5,340 @@ Args: event - dict with httpMethod, body (email, password, full_name)
 Returns: HTTP response with JWT token and user data
 '''
 import json
+import math
 import os
-from typing import Dict, Any
-import psycopg2
-import bcrypt
-import jwt
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from random import random
+from time import monotonic, perf_counter
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
-from pydantic import BaseModel, EmailStr, Field, ValidationError
 
 
-class RegisterRequest(BaseModel):
-    email: EmailStr
-    password: str = Field(..., min_length=6)
-    full_name: str = Field(..., min_length=1)
+@lru_cache(maxsize=None)
+def request_model() -> Any:
+    '''
+    Build the pydantic request model on first use; pydantic and
+    email_validator make up most of the cold-start import time and
+    OPTIONS preflights never need them.
+    '''
+    from pydantic import BaseModel, EmailStr, Field
+
+    class RegisterRequest(BaseModel):
+        email: EmailStr
+        password: str = Field(..., min_length=6)
+        full_name: str = Field(..., min_length=1)
+
+    return RegisterRequest
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+class HasherBusy(Exception):
+    '''Raised when the hashing pool has no free slot for another request'''
+
+
+class PasswordHasher:
+    '''
+    Runs bcrypt in a bounded worker pool at a cost calibrated against a
+    latency budget. When every slot is taken, new work is rejected with
+    HasherBusy instead of queueing, so a login storm fails fast.
+    Calibration never goes below bcrypt's default cost of 12, and each
+    instance calibrates on its own hardware; set BCRYPT_TARGET_COST to give
+    the whole fleet one cost.
+    '''
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, latency_budget_ms: float = 250.0,
+                 min_cost: int = 12, max_cost: int = 14, target_cost: Optional[int] = None):
+        self.latency_budget_ms = latency_budget_ms
+        self.min_cost = min_cost
+        self.max_cost = max_cost
+        self._target_cost = target_cost
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._calibrate_lock = threading.Lock()
+
+    def calibrate_in_background(self) -> None:
+        # Started at import without blocking it, so a cold start and its OPTIONS
+        # preflights are not delayed and the first hash usually finds the cost chosen
+        if self._target_cost is None:
+            threading.Thread(target=lambda: self.target_cost, name='bcrypt-calibrate', daemon=True).start()
+
+    @property
+    def target_cost(self) -> int:
+        # A request that arrives mid-calibration waits for it under the lock
+        if self._target_cost is None:
+            with self._calibrate_lock:
+                if self._target_cost is None:
+                    self._target_cost = self._calibrate()
+        return self._target_cost
+
+    def _calibrate(self) -> int:
+        import bcrypt
+        
+        # Time one hash at the minimum cost; every extra cost step doubles it
+        started = monotonic()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(self.min_cost))
+        elapsed_ms = max((monotonic() - started) * 1000, 0.001)
+        steps = int(math.log2(self.latency_budget_ms / elapsed_ms)) if elapsed_ms < self.latency_budget_ms else 0
+        return max(self.min_cost, min(self.max_cost, self.min_cost + steps))
+
+    def _run(self, fn: Any, *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        import bcrypt
+        
+        salt = bcrypt.gensalt(self.target_cost)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password: str, password_hash: str) -> bool:
+        import bcrypt
+        
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # Hash layout is $2b$<cost>$<salt+digest>. Only ever upgrade: instances
+        # that calibrated differently must not rewrite each other's hashes
+        try:
+            return int(password_hash.split('$')[2]) < self.target_cost
+        except (IndexError, ValueError):
+            return False
+
+
+target_cost_env = os.environ.get('BCRYPT_TARGET_COST')
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get('BCRYPT_WORKERS', '2')),
+    max_pending=int(os.environ.get('BCRYPT_MAX_PENDING', '8')),
+    latency_budget_ms=float(os.environ.get('BCRYPT_LATENCY_BUDGET_MS', '250')),
+    target_cost=int(target_cost_env) if target_cost_env else None
+)
+password_hasher.calibrate_in_background()
+
+
+TIMING_LOG_SAMPLE_RATE = float(os.environ.get('TIMING_LOG_SAMPLE_RATE', '0.01'))
+
+
+class PhaseTimer:
+    '''
+    Wall-clock time spent in each phase of one invocation. Phases are charged
+    by mark(), which bills everything since the previous mark, so the hot path
+    pays one perf_counter() call per phase. finish() reports the phases in a
+    Server-Timing header and, for a sampled share of requests, as a one-line
+    JSON log keyed by the platform request id, together with the process's
+    pool and cache counters when a counters callable is given.
+    '''
+    
+    def __init__(self, function_name: str, counters: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+        self.function_name = function_name
+        self.counters = counters
+        self.started = self.last = perf_counter()
+        self.phases: Dict[str, float] = {}
+    
+    def mark(self, phase: str) -> None:
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+    
+    def finish(self, response: Optional[Dict[str, Any]], context: Any, method: str) -> None:
+        total_ms = (perf_counter() - self.started) * 1000
+        
+        if response is not None:
+            metrics = [f'{phase};dur={ms:.2f}' for phase, ms in self.phases.items()]
+            metrics.append(f'total;dur={total_ms:.2f}')
+            headers = response.setdefault('headers', {})
+            headers['Server-Timing'] = ', '.join(metrics)
+            headers['Timing-Allow-Origin'] = '*'
+            exposed = headers.get('Access-Control-Expose-Headers')
+            headers['Access-Control-Expose-Headers'] = f'{exposed}, Server-Timing' if exposed else 'Server-Timing'
+        
+        if random() < TIMING_LOG_SAMPLE_RATE:
+            record = {
+                'request_id': getattr(context, 'request_id', None),
+                'function': self.function_name,
+                'method': method,
+                # No response means the handler raised
+                'status': response.get('statusCode') if response is not None else 500,
+                'total_ms': round(total_ms, 2),
+                'phases_ms': {phase: round(ms, 2) for phase, ms in self.phases.items()}
+            }
+            if self.counters is not None:
+                # Cumulative since the process started, so rates come from differences between samples
+                record['counters'] = self.counters()
+            print(json.dumps(record))
+
+
+def runtime_counters() -> Dict[str, Any]:
+    return {'db_pool': db_pool.stats()}
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    timer = PhaseTimer('auth-register', runtime_counters)
+    response = None
+    try:
+        response = handle_request(event, context, timer)
+        return response
+    finally:
+        timer.finish(response, context, event.get('httpMethod', 'POST'))
+
+
+def handle_request(event: Dict[str, Any], context: Any, timer: PhaseTimer) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'POST')
     
     # Handle CORS OPTIONS request
@@ -47,19 +365,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     # Parse and validate request
     body_data = json.loads(event.get('body', '{}'))
-    register_req = RegisterRequest(**body_data)
-    
-    # Connect to database
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
-    cur = conn.cursor()
+    register_req = request_model()(**body_data)
+    timer.mark('validate')
     
-    # Check if user already exists
-    cur.execute("SELECT id FROM users WHERE email = %s", (register_req.email,))
-    existing_user = cur.fetchone()
+    # Take a pooled connection instead of opening a new one per request, and
+    # give it back before hashing so bcrypt never holds a database slot
+    conn = db_pool.getconn()
+    try:
+        cur = conn.cursor()
+        timer.mark('connect')
+        
+        # Check if user already exists
+        cur.execute("SELECT id FROM users WHERE email = %s", (register_req.email,))
+        existing_user = cur.fetchone()
+        cur.close()
+    finally:
+        db_pool.putconn(conn)
+    timer.mark('query')
     
     if existing_user:
-        cur.close()
-        conn.close()
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -67,20 +391,49 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    # Hash password
-    password_hash = bcrypt.hashpw(register_req.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    # Hash password in the bounded hashing pool
+    try:
+        password_hash = password_hasher.hash(register_req.password)
+        timer.mark('hash')
+    except HasherBusy:
+        return {
+            'statusCode': 429,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Retry-After': '1'},
+            'body': json.dumps({'error': 'Too many requests, please try again later'}),
+            'isBase64Encoded': False
+        }
+    
+    # Insert user; a registration for the same email may have won the race while we hashed
+    import psycopg2.errors
+    
+    conn = db_pool.getconn()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO users (email, password_hash, full_name) VALUES (%s, %s, %s) RETURNING id, email, full_name, created_at",
+            (register_req.email, password_hash, register_req.full_name)
+        )
+        user_data = cur.fetchone()
+        conn.commit()
+        cur.close()
+    except psycopg2.errors.UniqueViolation:
+        conn.rollback()
+        user_data = None
+    finally:
+        db_pool.putconn(conn)
+    timer.mark('query')
     
-    # Insert user
-    cur.execute(
-        "INSERT INTO users (email, password_hash, full_name) VALUES (%s, %s, %s) RETURNING id, email, full_name, created_at",
-        (register_req.email, password_hash, register_req.full_name)
-    )
-    user_data = cur.fetchone()
-    conn.commit()
-    cur.close()
-    conn.close()
+    if user_data is None:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'User with this email already exists'}),
+            'isBase64Encoded': False
+        }
     
     # Generate JWT token
+    import jwt
+    
     jwt_secret = os.environ.get('JWT_SECRET', 'default-secret-key')
     token_payload = {
         'user_id': user_data[0],
@@ -88,6 +441,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         'exp': datetime.utcnow() + timedelta(days=7)
     }
     token = jwt.encode(token_payload, jwt_secret, algorithm='HS256')
+    timer.mark('token')
     
     return {
         'statusCode': 201,
@@ -0,0 +1,119 @@
+'''
+Cold-start benchmark for the backend functions.
+
+Every run starts a fresh interpreter with `python -X importtime`, imports the
+function's index module and answers one OPTIONS preflight, i.e. the work a
+cold instance does before it can respond at all. Results are printed as JSON
+so runs can be diffed between commits, and a run can be checked against a
+saved baseline:
+
+    python backend/benchmarks/cold_start.py --runs 7 > baseline.json
+    python backend/benchmarks/cold_start.py --baseline baseline.json --tolerance 20
+
+The exit code is 1 when a heavy module is loaded on the preflight path or an
+import time regresses past the tolerance.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded on the code paths that need them
+HEAVY_MODULES = ['pydantic', 'email_validator', 'psycopg2', 'bcrypt', 'jwt', 'smtplib']
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+import index
+imported = time.perf_counter()
+index.handler({'httpMethod': 'OPTIONS', 'headers': {}}, None)
+handled = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'options_ms': (handled - imported) * 1000}))
+'''
+
+
+def discover_functions() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, 'index.py'))
+    )
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    '''Map each imported module to its cumulative import time in microseconds'''
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        _, cumulative_us, name = fields
+        modules[name.strip()] = int(cumulative_us.strip())
+    return modules
+
+
+def run_once(function_name: str) -> Dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=os.path.join(BACKEND_DIR, function_name),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    timings['modules'] = modules
+    return timings
+
+
+def benchmark(function_name: str, runs: int) -> Dict[str, Any]:
+    samples = [run_once(function_name) for _ in range(runs)]
+    loaded = set(samples[-1]['modules'])
+    top_level = {name: us for name, us in samples[-1]['modules'].items() if '.' not in name}
+    return {
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 2),
+        'options_ms': round(statistics.median(s['options_ms'] for s in samples), 2),
+        'heavy_modules_loaded': [m for m in HEAVY_MODULES if m in loaded],
+        'slowest_imports_us': dict(sorted(top_level.items(), key=lambda item: -item[1])[:10])
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('functions', nargs='*', help='function directories to measure (default: all)')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per function (median is reported)')
+    parser.add_argument('--baseline', help='JSON output of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=25.0, help='allowed import_ms regression in percent')
+    args = parser.parse_args()
+
+    report = {name: benchmark(name, args.runs) for name in (args.functions or discover_functions())}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    failures = []
+    for name, result in report.items():
+        if result['heavy_modules_loaded']:
+            failures.append(f"{name}: OPTIONS path loads {', '.join(result['heavy_modules_loaded'])}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, result in report.items():
+            if name not in baseline:
+                continue
+            limit = baseline[name]['import_ms'] * (1 + args.tolerance / 100)
+            if result['import_ms'] > limit:
+                failures.append(f"{name}: import_ms {result['import_ms']} exceeds baseline {baseline[name]['import_ms']} by more than {args.tolerance}%")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
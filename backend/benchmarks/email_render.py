@@ -0,0 +1,98 @@
+'''
+Microbenchmark for rendering reminder emails in send-notification.
+
+Compares, for the same batch of notifications:
+
+    mime      - format both bodies, build MIMEMultipart with two MIMEText
+                parts and flatten it (what each send used to do)
+    template  - NotificationTemplate.render_batch: precompiled templates,
+                pre-encoded MIME skeleton, one bytes join per message
+
+No database or SMTP server is needed:
+
+    python backend/benchmarks/email_render.py
+    python backend/benchmarks/email_render.py --messages 20000 --repeat 5
+
+Results are printed as JSON (messages/sec is the best of --repeat runs).
+'''
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from time import perf_counter
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_send_notification() -> Any:
+    spec = importlib.util.spec_from_file_location('send_notification_index', os.path.join(BACKEND_DIR, 'send-notification', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def render_mime(module: Any, notifications: List[Any], smtp_from: str) -> List[bytes]:
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    text_format = module.TEMPLATE_FIELD_RE.sub(r'{\1}', module.TEXT_TEMPLATE)
+    html_format = module.TEMPLATE_FIELD_RE.sub(r'{\1}', module.HTML_TEMPLATE)
+    description_format = module.TEMPLATE_FIELD_RE.sub(r'{\1}', module.HTML_DESCRIPTION_TEMPLATE)
+    rendered = []
+    for req in notifications:
+        values = req.model_dump()
+        values['description_block'] = description_format.format(**values) if req.reminder_description else ''
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f'Напоминание: {req.reminder_title}'
+        msg['From'] = smtp_from
+        msg['To'] = req.to_email
+        msg.attach(MIMEText(text_format.format(**values), 'plain', 'utf-8'))
+        msg.attach(MIMEText(html_format.format(**values), 'html', 'utf-8'))
+        rendered.append(msg.as_bytes())
+    return rendered
+
+
+def render_template(module: Any, notifications: List[Any], smtp_from: str) -> List[bytes]:
+    return [data for _, _, data in module.notification_template().render_batch(notifications, smtp_from)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    module = load_send_notification()
+    NotificationRequest = module.request_model()
+    notifications = [
+        NotificationRequest(
+            to_email=f'user{n}@example.com',
+            reminder_title=f'Встреча с командой №{n}',
+            reminder_date='2025-01-15',
+            reminder_time='14:00',
+            reminder_description='Обсудить план & сроки <важно>' if n % 2 else ''
+        )
+        for n in range(args.messages)
+    ]
+    smtp_from = 'RemindMe <noreply@example.com>'
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, render in (('mime', render_mime), ('template', render_template)):
+        # The first run pays for imports and template compilation and is not counted
+        render(module, notifications[:10], smtp_from)
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = perf_counter()
+            render(module, notifications, smtp_from)
+            best = min(best, perf_counter() - started)
+        report[name] = {'seconds': round(best, 4), 'messages_per_sec': round(args.messages / best)}
+    report['speedup'] = round(report['mime']['seconds'] / report['template']['seconds'], 2)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+'''
+Throughput benchmark for the two reminders list serialization paths.
+
+For each size a throwaway user with that many reminders is seeded inside a
+transaction that is rolled back at the end, then the list query and response
+assembly of backend/reminders are timed in both modes:
+
+    python  - fetch tuples, build dicts, isoformat/strftime per row, json.dumps
+    server  - Postgres renders each row with json_build_object, Python joins text
+
+Requires DATABASE_URL pointing at a database with db_migrations applied:
+
+    DATABASE_URL=postgresql://localhost/reminders python backend/benchmarks/list_serialization.py
+    python backend/benchmarks/list_serialization.py --sizes 1000 10000 100000 --repeat 5
+
+Results are printed as JSON (rows/sec is the best of --repeat runs).
+'''
+import argparse
+import importlib.util
+import json
+import os
+import sys
+from time import perf_counter
+from typing import Dict, Any
+
+import psycopg2
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_reminders_module() -> Any:
+    spec = importlib.util.spec_from_file_location('reminders_index', os.path.join(BACKEND_DIR, 'reminders', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seed(cur: Any, size: int) -> int:
+    cur.execute(
+        "INSERT INTO users (email, password_hash, full_name) VALUES (%s, 'x', 'Benchmark') RETURNING id",
+        (f'list-benchmark-{size}@example.com',)
+    )
+    user_id = cur.fetchone()[0]
+    cur.execute(
+        """INSERT INTO reminders (user_id, title, description, date, time, frequency)
+        SELECT %s, 'Напоминание ' || n, 'Описание напоминания номер ' || n,
+               DATE '2025-01-01' + (n %% 365), TIME '08:00' + (n %% 96) * INTERVAL '15 minutes',
+               (ARRAY['once', 'daily', 'weekly', 'monthly', 'yearly'])[n %% 5 + 1]
+        FROM generate_series(1, %s) AS n""",
+        (user_id, size)
+    )
+    cur.execute("ANALYZE reminders")
+    return user_id
+
+
+def run(cur: Any, reminders: Any, user_id: int, mode: str) -> float:
+    started = perf_counter()
+    cur.execute(
+        f"SELECT {reminders.LIST_COLUMNS[mode]} FROM reminders WHERE user_id = %s ORDER BY date, time, id",
+        (user_id,)
+    )
+    rows = cur.fetchall()
+    body = f'{{"reminders": {reminders.render_reminders(rows, mode)}, "next_cursor": null}}'
+    elapsed = perf_counter() - started
+    assert len(rows) and body
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    reminders = load_reminders_module()
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    report: Dict[str, Dict[str, Any]] = {}
+    try:
+        cur = conn.cursor()
+        for size in args.sizes:
+            user_id = seed(cur, size)
+            result = {}
+            for mode in ('python', 'server'):
+                # The first run warms the buffer cache and is not counted
+                run(cur, reminders, user_id, mode)
+                best = min(run(cur, reminders, user_id, mode) for _ in range(args.repeat))
+                result[mode] = {'seconds': round(best, 4), 'rows_per_sec': round(size / best)}
+            result['speedup'] = round(result['python']['seconds'] / result['server']['seconds'], 2)
+            report[str(size)] = result
+        cur.close()
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
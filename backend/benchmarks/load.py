@@ -0,0 +1,277 @@
+'''
+Load benchmark that drives the functions' handler() directly.
+
+A throwaway database is created next to the one in DATABASE_URL, migrated
+with db_migrations, seeded with synthetic users and reminders, and dropped
+afterwards. Each scenario sends synthetic API-gateway events to the
+imported index.handler of its function, so the numbers cover everything
+from event parsing to the response dict but no network or gateway hops.
+
+    DATABASE_URL=postgresql://postgres@localhost/postgres python backend/benchmarks/load.py
+    python backend/benchmarks/load.py --users 50 --reminders-per-user 2000 --requests 500 --concurrency 4 -o after.json
+
+The report is JSON (throughput and p50/p95/p99 latency per scenario), so two
+runs can be diffed between commits.
+'''
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, Any, List, Callable, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import bcrypt
+import jwt
+import psycopg2
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'db_migrations')
+PASSWORD = 'benchmark-password'
+
+
+class Context:
+    def __init__(self):
+        self.request_id = str(uuid.uuid4())
+
+
+def with_database(url: str, name: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, '/' + name, parts.query, parts.fragment))
+
+
+def create_database(admin_url: str, name: str) -> str:
+    conn = psycopg2.connect(admin_url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'CREATE DATABASE "{name}" ENCODING \'UTF8\' TEMPLATE template0')
+    conn.close()
+
+    url = with_database(admin_url, name)
+    conn = psycopg2.connect(url)
+    with conn.cursor() as cur:
+        for migration in sorted(os.listdir(MIGRATIONS_DIR)):
+            if migration.endswith('.sql'):
+                with open(os.path.join(MIGRATIONS_DIR, migration)) as f:
+                    cur.execute(f.read())
+    conn.commit()
+    conn.close()
+    return url
+
+
+def drop_database(admin_url: str, name: str) -> None:
+    conn = psycopg2.connect(admin_url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    conn.close()
+
+
+def seed(url: str, users: int, reminders_per_user: int, bcrypt_cost: int) -> Tuple[List[Tuple[int, str]], Dict[int, List[int]]]:
+    # One hash is shared by every user; hashing per user would dominate seeding
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(bcrypt_cost)).decode('utf-8')
+    conn = psycopg2.connect(url)
+    with conn.cursor() as cur:
+        cur.execute(
+            """INSERT INTO users (email, password_hash, full_name)
+            SELECT 'bench-' || n || '@example.com', %s, 'Bench User ' || n FROM generate_series(1, %s) AS n
+            RETURNING id, email""",
+            (password_hash, users)
+        )
+        seeded_users = cur.fetchall()
+        cur.execute(
+            """INSERT INTO reminders (user_id, title, description, date, time, frequency, next_fire_at)
+            SELECT user_id, title, description, date, time, frequency,
+                   reminder_next_fire_at(date, time, frequency, LOCALTIMESTAMP)
+            FROM (
+                SELECT u.id AS user_id, 'Напоминание ' || n AS title, 'Описание встречи номер ' || n AS description,
+                       DATE '2025-01-01' + (n %% 365) AS date, TIME '08:00' + (n %% 48) * INTERVAL '15 minutes' AS time,
+                       (ARRAY['once', 'daily', 'weekly', 'monthly', 'yearly'])[n %% 5 + 1] AS frequency
+                FROM users u, generate_series(1, %s) AS n
+            ) seed""",
+            (reminders_per_user,)
+        )
+        cur.execute("SELECT user_id, array_agg(id) FROM reminders GROUP BY user_id")
+        reminder_ids = {user_id: ids for user_id, ids in cur.fetchall()}
+        cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return seeded_users, reminder_ids
+
+
+def load_module(function_name: str) -> Any:
+    path = os.path.join(BACKEND_DIR, function_name, 'index.py')
+    spec = importlib.util.spec_from_file_location(function_name.replace('-', '_') + '_index', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_token(user_id: int, email: str) -> str:
+    return jwt.encode(
+        {'user_id': user_id, 'email': email, 'exp': datetime.utcnow() + timedelta(days=7)},
+        os.environ.get('JWT_SECRET', 'default-secret-key'),
+        algorithm='HS256'
+    )
+
+
+def build_scenarios(users: List[Tuple[int, str]], reminder_ids: Dict[int, List[int]]) -> Dict[str, Tuple[str, Callable[[int], Dict[str, Any]]]]:
+    tokens = {user_id: make_token(user_id, email) for user_id, email in users}
+    rng = random.Random(42)
+
+    def auth(user_id: int) -> Dict[str, str]:
+        return {'X-Auth-Token': tokens[user_id]}
+
+    def pick_user() -> int:
+        return rng.choice(users)[0]
+
+    def get_list(i: int) -> Dict[str, Any]:
+        return {'httpMethod': 'GET', 'headers': auth(pick_user()), 'queryStringParameters': {}}
+
+    def search(i: int) -> Dict[str, Any]:
+        term = rng.choice(['напом', 'встреч', 'номер 1', 'опис'])
+        return {'httpMethod': 'GET', 'headers': auth(pick_user()), 'queryStringParameters': {'search': term}}
+
+    def create(i: int) -> Dict[str, Any]:
+        body = {'title': f'Load test {i}', 'description': 'Created by the load benchmark', 'date': '2025-06-01', 'time': '12:00', 'frequency': 'weekly'}
+        return {'httpMethod': 'POST', 'headers': auth(pick_user()), 'body': json.dumps(body)}
+
+    def update(i: int) -> Dict[str, Any]:
+        user_id = pick_user()
+        body = {'title': f'Updated {i}', 'time': '13:15'}
+        return {'httpMethod': 'PUT', 'headers': auth(user_id), 'queryStringParameters': {'id': str(rng.choice(reminder_ids[user_id]))}, 'body': json.dumps(body)}
+
+    def delete(i: int) -> Dict[str, Any]:
+        user_id = pick_user()
+        return {'httpMethod': 'DELETE', 'headers': auth(user_id), 'queryStringParameters': {'id': str(rng.choice(reminder_ids[user_id]))}}
+
+    def login(i: int) -> Dict[str, Any]:
+        return {'httpMethod': 'POST', 'headers': {}, 'body': json.dumps({'email': rng.choice(users)[1], 'password': PASSWORD})}
+
+    run_id = uuid.uuid4().hex[:8]
+
+    def register(i: int) -> Dict[str, Any]:
+        body = {'email': f'register-{run_id}-{i}@example.com', 'password': PASSWORD, 'full_name': 'Load Test'}
+        return {'httpMethod': 'POST', 'headers': {}, 'body': json.dumps(body)}
+
+    return {
+        'GET list': ('reminders', get_list),
+        'GET search': ('reminders', search),
+        'POST': ('reminders', create),
+        'PUT': ('reminders', update),
+        'DELETE': ('reminders', delete),
+        'login': ('auth-login', login),
+        'register': ('auth-register', register)
+    }
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_scenario(handler: Callable, make_event: Callable[[int], Dict[str, Any]], requests: int, concurrency: int) -> Dict[str, Any]:
+    # Events are built up front so their construction is not timed
+    events = [make_event(i) for i in range(requests + 1)]
+
+    def invoke(event: Dict[str, Any]) -> Tuple[float, int]:
+        started = perf_counter()
+        try:
+            status = handler(event, Context())['statusCode']
+        except Exception:
+            status = 500
+        return (perf_counter() - started) * 1000, status
+
+    # One untimed request pays for lazy imports and the first connection
+    invoke(events.pop())
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(invoke, events))
+    elapsed = perf_counter() - started
+
+    latencies = [latency for latency, _ in outcomes]
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, status in outcomes if status >= 400),
+        'throughput_rps': round(requests / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3)
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--reminders-per-user', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='threads invoking the handler in parallel')
+    parser.add_argument('--scenarios', nargs='*', help='subset of scenario names to run')
+    parser.add_argument('--bcrypt-cost', type=int, default=10, help='cost of seeded password hashes and BCRYPT_TARGET_COST')
+    parser.add_argument('--keep-database', action='store_true', help='do not drop the throwaway database')
+    parser.add_argument('-o', '--output', help='write the JSON report here as well as to stdout')
+    args = parser.parse_args()
+
+    admin_url = os.environ['DATABASE_URL']
+    database = f'reminders_bench_{uuid.uuid4().hex[:8]}'
+    url = create_database(admin_url, database)
+    try:
+        users, reminder_ids = seed(url, args.users, args.reminders_per_user, args.bcrypt_cost)
+
+        # The functions read their configuration when imported or on first use
+        os.environ['DATABASE_URL'] = url
+        os.environ['BCRYPT_TARGET_COST'] = str(args.bcrypt_cost)
+        modules = {name: load_module(name) for name in ('reminders', 'auth-login', 'auth-register')}
+
+        results = {}
+        for name, (function_name, make_event) in build_scenarios(users, reminder_ids).items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            results[name] = run_scenario(modules[function_name].handler, make_event, args.requests, args.concurrency)
+
+        for module in modules.values():
+            # Release pooled connections so the database can be dropped
+            while module.db_pool._idle:
+                module.db_pool._discard(module.db_pool._idle.pop()[0])
+    finally:
+        os.environ['DATABASE_URL'] = admin_url
+        if not args.keep_database:
+            drop_database(admin_url, database)
+
+    report = {
+        'revision': git_revision(),
+        'config': {
+            'users': args.users,
+            'reminders_per_user': args.reminders_per_user,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'bcrypt_cost': args.bcrypt_cost
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+'''
+Drain throughput benchmark for the send-notification outbox.
+
+A throwaway database (see load.py) is filled with --messages outbox rows,
+then send-notification ?action=drain is invoked until nothing is due,
+delivering to the in-process SMTP sink from smtp_sink.py. This is repeated
+for every --concurrency level with a freshly imported module, since
+SMTP_CONCURRENCY is read at import:
+
+    DATABASE_URL=postgresql://postgres@localhost/postgres python backend/benchmarks/outbox_drain.py
+    python backend/benchmarks/outbox_drain.py --messages 5000 --concurrency 1 8 32 --latency-ms 20
+
+Results are printed as JSON (seconds and messages/sec per concurrency level).
+'''
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import uuid
+from time import perf_counter
+from typing import Dict, Any
+
+import psycopg2
+
+from load import BACKEND_DIR, create_database, drop_database
+from smtp_sink import start_sink
+
+
+def load_send_notification(tag: str) -> Any:
+    spec = importlib.util.spec_from_file_location(f'send_notification_{tag}', os.path.join(BACKEND_DIR, 'send-notification', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def fill_outbox(url: str, messages: int) -> None:
+    conn = psycopg2.connect(url)
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE notification_outbox")
+        cur.execute(
+            """INSERT INTO notification_outbox (idempotency_key, payload)
+            SELECT 'bench-' || n, json_build_object(
+                'to_email', 'user' || n || '@example.com', 'reminder_title', 'Напоминание ' || n,
+                'reminder_date', '2025-01-15', 'reminder_time', '14:00', 'reminder_description', 'Описание')
+            FROM generate_series(1, %s) AS n""",
+            (messages,)
+        )
+    conn.commit()
+    conn.close()
+
+
+def drain(module: Any) -> Dict[str, Any]:
+    calls = 0
+    totals: Dict[str, int] = {}
+    started = perf_counter()
+    while True:
+        response = module.handler({'httpMethod': 'POST', 'queryStringParameters': {'action': 'drain'}}, None)
+        outcome = json.loads(response['body'])
+        calls += 1
+        for name, count in outcome.items():
+            totals[name] = totals.get(name, 0) + count
+        if outcome['claimed'] == 0:
+            break
+    return {'seconds': perf_counter() - started, 'drain_calls': calls, **totals}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='SMTP sink delay before every reply')
+    parser.add_argument('--rate', type=float, default=0.0, help='SMTP_RATE_PER_SECOND (default: effectively unlimited)')
+    parser.add_argument('--throttle-every', type=int, default=0, help='have the sink answer every Nth recipient with 451')
+    args = parser.parse_args()
+
+    sink = start_sink(latency_ms=args.latency_ms, throttle_every=args.throttle_every)
+    admin_url = os.environ['DATABASE_URL']
+    database = f'outbox_bench_{uuid.uuid4().hex[:8]}'
+    url = create_database(admin_url, database)
+    report = {}
+    try:
+        os.environ.update({
+            'DATABASE_URL': url,
+            'SMTP_HOST': '127.0.0.1',
+            'SMTP_PORT': str(sink.server_address[1]),
+            'SMTP_STARTTLS': 'false',
+            'SMTP_USER': 'bench',
+            'SMTP_PASSWORD': 'bench',
+            'SMTP_RATE_PER_SECOND': str(args.rate or 1000000),
+            'SMTP_RATE_BURST': str(int(args.rate) or 1000000),
+            # Rows are due immediately, so the drain retries throttled ones in the same run
+            'OUTBOX_RETRY_BASE_SECONDS': '0'
+        })
+        for concurrency in args.concurrency:
+            os.environ['SMTP_CONCURRENCY'] = str(concurrency)
+            module = load_send_notification(str(concurrency))
+            fill_outbox(url, args.messages)
+            before = sink.messages
+            result = drain(module)
+            result['delivered'] = sink.messages - before
+            result['messages_per_sec'] = round(result['delivered'] / result['seconds'], 1)
+            result['seconds'] = round(result['seconds'], 3)
+            report[str(concurrency)] = result
+            module.smtp_delivery.close()
+            while module.db_pool._idle:
+                module.db_pool._discard(module.db_pool._idle.pop()[0])
+    finally:
+        os.environ['DATABASE_URL'] = admin_url
+        drop_database(admin_url, database)
+        sink.shutdown()
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+'''
+Local stand-in SMTP server for exercising send-notification without a provider.
+
+Speaks just enough ESMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT), accepts any credentials and discards the messages. Each
+reply can be delayed to imitate a remote server's round trip, and every Nth
+recipient can be answered with a 451 to exercise throttling back-off.
+
+    python backend/benchmarks/smtp_sink.py --port 2525 --latency-ms 20
+    SMTP_HOST=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false SMTP_USER=x SMTP_PASSWORD=x ...
+
+It can also be started in-process with start_sink(), as outbox_drain.py does.
+'''
+import argparse
+import socketserver
+import sys
+import threading
+from time import sleep
+from typing import Any
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        if self.server.latency:
+            sleep(self.server.latency)
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        self.reply('220 sink ESMTP ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.reply('250-sink\r\n250-8BITMIME\r\n250 AUTH PLAIN')
+            elif verb == 'HELO':
+                self.reply('250 sink')
+            elif verb == 'AUTH':
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb in ('MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if self.server.should_throttle():
+                    self.reply('451 4.7.1 Rate limited, try again later')
+                else:
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+                self.server.count_message()
+                self.reply('250 OK queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Any, latency_ms: float = 0.0, throttle_every: int = 0):
+        super().__init__(address, SinkHandler)
+        self.latency = latency_ms / 1000
+        self.throttle_every = throttle_every
+        self.messages = 0
+        self.recipients = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            self.recipients += 1
+            throttle = bool(self.throttle_every) and self.recipients % self.throttle_every == 0
+            self.throttled += throttle
+            return throttle
+
+    def count_message(self) -> None:
+        with self._lock:
+            self.messages += 1
+
+
+def start_sink(port: int = 0, latency_ms: float = 0.0, throttle_every: int = 0) -> SinkServer:
+    '''Serve in a daemon thread; the bound port is server.server_address[1]'''
+    server = SinkServer(('127.0.0.1', port), latency_ms, throttle_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='delay before every reply')
+    parser.add_argument('--throttle-every', type=int, default=0, help='answer every Nth recipient with 451')
+    args = parser.parse_args()
+
+    server = start_sink(args.port, args.latency_ms, args.throttle_every)
+    print(f'SMTP sink listening on 127.0.0.1:{server.server_address[1]}', file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    print(f'{server.messages} messages accepted, {server.throttled} recipients throttled', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+'''
+Business: Move reminders that can no longer fire into reminders_archive
+Args: event - dict with httpMethod, headers (X-Admin-Token), queryStringParameters (batch_size, max_batches); invoked by a timer trigger
+      context - object with request_id attribute
+Returns: HTTP response with counts of archived reminders and affected users
+'''
+import hmac
+import json
+import os
+import threading
+import weakref
+from time import monotonic
+from typing import Dict, Any, List, Tuple
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+DEFAULT_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+DEFAULT_MAX_BATCHES = int(os.environ.get('ARCHIVE_MAX_BATCHES', '10'))
+# Rows stay in the hot table this long after they stop firing, so delta-sync
+# clients see the soft delete as an ordinary row change first
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+
+
+def archive_batch(conn: Any, batch_size: int, after_days: int) -> Tuple[int, int]:
+    '''
+    Move up to batch_size soft-deleted or spent one-off reminders into
+    reminders_archive with one statement, and bump the owners' list version
+    in the same transaction so cached pages and ETags notice. Both kinds of
+    candidate are found through their own partial index; SKIP LOCKED keeps
+    the job out of the way of users editing those rows. Returns
+    (archived, users).
+    '''
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """WITH candidates AS (
+                SELECT id FROM reminders
+                WHERE (is_active = false AND updated_at < LOCALTIMESTAMP - make_interval(days => %s))
+                   OR (is_active = true AND frequency = 'once' AND next_fire_at IS NULL AND date + time < LOCALTIMESTAMP - make_interval(days => %s))
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ), moved AS (
+                DELETE FROM reminders r USING candidates c WHERE r.id = c.id
+                RETURNING r.id, r.user_id, r.title, r.description, r.date, r.time, r.frequency, r.is_active, r.created_at, r.updated_at
+            )
+            INSERT INTO reminders_archive (id, user_id, title, description, date, time, frequency, created_at, updated_at, archive_reason)
+            SELECT id, user_id, title, description, date, time, frequency, created_at, updated_at, CASE WHEN is_active THEN 'expired' ELSE 'deleted' END
+            FROM moved
+            RETURNING user_id""",
+            (after_days, after_days, batch_size)
+        )
+        moved = cur.fetchall()
+        user_ids = sorted({row[0] for row in moved})
+        if user_ids:
+            cur.execute("UPDATE users SET reminders_version = reminders_version + 1 WHERE id = ANY(%s)", (user_ids,))
+        conn.commit()
+        return len(moved), len(user_ids)
+    finally:
+        cur.close()
+
+
+def admin_authorized(headers: Dict[str, Any]) -> bool:
+    '''Timer triggers and operators pass ADMIN_TOKEN in X-Admin-Token; while it is unset nobody is let in'''
+    expected = os.environ.get('ADMIN_TOKEN')
+    supplied = headers.get('X-Admin-Token') or headers.get('x-admin-token')
+    if not expected or not isinstance(supplied, str):
+        return False
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'POST')
+    
+    # Handle CORS OPTIONS request
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Admin-Token',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if not admin_authorized(event.get('headers') or {}):
+        return {
+            'statusCode': 403,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Admin token required'}),
+            'isBase64Encoded': False
+        }
+    
+    params = event.get('queryStringParameters') or {}
+    try:
+        batch_size = min(max(int(params.get('batch_size') or DEFAULT_BATCH_SIZE), 1), 5000)
+        max_batches = min(max(int(params.get('max_batches') or DEFAULT_MAX_BATCHES), 1), 100)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'batch_size and max_batches must be integers'}),
+            'isBase64Encoded': False
+        }
+    
+    archived = 0
+    users = 0
+    batches = 0
+    
+    conn = db_pool.getconn()
+    try:
+        # Short transactions keep row locks brief; a backlog is worked off over several ticks
+        while batches < max_batches:
+            batch_archived, batch_users = archive_batch(conn, batch_size, ARCHIVE_AFTER_DAYS)
+            batches += 1
+            archived += batch_archived
+            users += batch_users
+            if batch_archived < batch_size:
+                break
+    finally:
+        db_pool.putconn(conn)
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'archived': archived,
+            'users': users,
+            'batches': batches,
+            'db_pool': db_pool.stats()
+        }),
+        'isBase64Encoded': False
+    }
@@ -0,0 +1,292 @@
+'''
+Business: Queue emails for due reminders and schedule their next occurrence
+Args: event - dict with httpMethod, headers (X-Admin-Token), queryStringParameters (batch_size, max_batches); invoked by a timer trigger
+      context - object with request_id attribute
+Returns: HTTP response with counts of claimed and queued reminders
+'''
+import hmac
+import json
+import os
+import threading
+import weakref
+from time import monotonic
+from typing import Dict, Any, List, Tuple
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+DEFAULT_BATCH_SIZE = int(os.environ.get('DISPATCH_BATCH_SIZE', '100'))
+DEFAULT_MAX_BATCHES = int(os.environ.get('DISPATCH_MAX_BATCHES', '10'))
+
+
+def dispatch_batch(conn: Any, batch_size: int) -> Tuple[int, int]:
+    '''
+    Claim up to batch_size due reminders, queue their emails in
+    notification_outbox and advance their next_fire_at in one transaction,
+    so an occurrence is either both queued and rescheduled or neither.
+    SKIP LOCKED lets concurrent workers take disjoint batches instead of
+    waiting on each other's rows. The idempotency key names the occurrence,
+    so a tick that re-claims it after a crash cannot queue a second email.
+    Returns (claimed, queued).
+    '''
+    from psycopg2.extras import execute_values
+    
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT r.id, r.title, r.description, r.next_fire_at, u.email FROM reminders r JOIN users u ON u.id = r.user_id WHERE r.is_active = true AND r.next_fire_at <= LOCALTIMESTAMP ORDER BY r.next_fire_at LIMIT %s FOR UPDATE OF r SKIP LOCKED",
+            (batch_size,)
+        )
+        due = cur.fetchall()
+        if not due:
+            conn.commit()
+            return 0, 0
+        
+        queued = execute_values(
+            cur,
+            "INSERT INTO notification_outbox (idempotency_key, payload) VALUES %s ON CONFLICT (idempotency_key) DO NOTHING RETURNING id",
+            [
+                (
+                    f'reminder:{reminder_id}:{fire_at.isoformat()}',
+                    json.dumps({
+                        'to_email': email,
+                        'reminder_title': title,
+                        'reminder_date': fire_at.date().isoformat(),
+                        'reminder_time': fire_at.strftime('%H:%M'),
+                        'reminder_description': description or ''
+                    }, ensure_ascii=False)
+                )
+                for reminder_id, title, description, fire_at, email in due
+            ],
+            fetch=True
+        )
+        cur.execute(
+            "UPDATE reminders SET next_fire_at = reminder_next_fire_at(date, time, frequency, LOCALTIMESTAMP) WHERE id = ANY(%s)",
+            ([reminder[0] for reminder in due],)
+        )
+        conn.commit()
+        return len(due), len(queued)
+    finally:
+        cur.close()
+
+
+def admin_authorized(headers: Dict[str, Any]) -> bool:
+    '''Timer triggers and operators pass ADMIN_TOKEN in X-Admin-Token; while it is unset nobody is let in'''
+    expected = os.environ.get('ADMIN_TOKEN')
+    supplied = headers.get('X-Admin-Token') or headers.get('x-admin-token')
+    if not expected or not isinstance(supplied, str):
+        return False
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'POST')
+    
+    # Handle CORS OPTIONS request
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Admin-Token',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if not admin_authorized(event.get('headers') or {}):
+        return {
+            'statusCode': 403,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Admin token required'}),
+            'isBase64Encoded': False
+        }
+    
+    params = event.get('queryStringParameters') or {}
+    try:
+        batch_size = min(max(int(params.get('batch_size') or DEFAULT_BATCH_SIZE), 1), 1000)
+        max_batches = min(max(int(params.get('max_batches') or DEFAULT_MAX_BATCHES), 1), 100)
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'batch_size and max_batches must be integers'}),
+            'isBase64Encoded': False
+        }
+    
+    claimed = 0
+    queued = 0
+    batches = 0
+    
+    conn = db_pool.getconn()
+    try:
+        # Keep claiming until the due set is drained or the tick budget is spent
+        while batches < max_batches:
+            batch_claimed, batch_queued = dispatch_batch(conn, batch_size)
+            batches += 1
+            claimed += batch_claimed
+            queued += batch_queued
+            if batch_claimed < batch_size:
+                break
+    finally:
+        db_pool.putconn(conn)
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'claimed': claimed,
+            'queued': queued,
+            'batches': batches,
+            'db_pool': db_pool.stats()
+        }),
+        'isBase64Encoded': False
+    }
@@ -0,0 +1,319 @@
+'''
+Business: Check reminder_stats against a recount of reminders and rebuild users that drifted
+Args: event - dict with httpMethod, headers (X-Admin-Token), queryStringParameters (repair, user_id); invoked by a timer trigger or by hand
+      context - object with request_id attribute
+Returns: HTTP response with the number of users checked and the ids that mismatched or were repaired
+'''
+import hmac
+import json
+import os
+import threading
+import weakref
+from time import monotonic
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+# Users whose counters or due-day buckets differ from a fresh recount; missing
+# rows on either side count as zeros
+MISMATCH_SQL = """
+WITH expected AS (
+    SELECT user_id,
+        count(*) FILTER (WHERE is_active IS TRUE) AS active,
+        count(*) FILTER (WHERE is_active IS NOT TRUE) AS inactive,
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'once') AS once,
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'daily') AS daily,
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'weekly') AS weekly,
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'monthly') AS monthly,
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'yearly') AS yearly
+    FROM reminders
+    WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s::int
+    GROUP BY user_id
+), stored AS (
+    SELECT * FROM reminder_stats WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s::int
+), expected_days AS (
+    SELECT user_id, next_fire_at::date AS day, count(*) AS reminders
+    FROM reminders
+    WHERE is_active IS TRUE AND next_fire_at IS NOT NULL AND (%(user_id)s::int IS NULL OR user_id = %(user_id)s::int)
+    GROUP BY 1, 2
+), stored_days AS (
+    SELECT * FROM reminder_stats_days WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s::int
+)
+SELECT user_id FROM expected e FULL JOIN stored s USING (user_id)
+WHERE (coalesce(e.active, 0), coalesce(e.inactive, 0), coalesce(e.once, 0), coalesce(e.daily, 0),
+       coalesce(e.weekly, 0), coalesce(e.monthly, 0), coalesce(e.yearly, 0))
+   <> (coalesce(s.active, 0), coalesce(s.inactive, 0), coalesce(s.once, 0), coalesce(s.daily, 0),
+       coalesce(s.weekly, 0), coalesce(s.monthly, 0), coalesce(s.yearly, 0))
+UNION
+SELECT user_id FROM expected_days e FULL JOIN stored_days s USING (user_id, day)
+WHERE coalesce(e.reminders, 0) <> coalesce(s.reminders, 0)
+ORDER BY 1
+"""
+
+
+def find_mismatches(conn: Any, user_id: Optional[int]) -> Tuple[int, List[int]]:
+    '''
+    Recount every user's reminders (or one user's) and compare with the
+    trigger-maintained tables. Runs in a REPEATABLE READ snapshot so writes
+    landing during the recount cannot show up as false drift. Returns
+    (users checked, mismatched user ids).
+    '''
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    cur = conn.cursor()
+    try:
+        cur.execute(MISMATCH_SQL, {'user_id': user_id})
+        mismatched = [row[0] for row in cur.fetchall()]
+        cur.execute(
+            "SELECT count(*) FROM reminder_stats WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s::int",
+            {'user_id': user_id}
+        )
+        checked = cur.fetchone()[0]
+        conn.commit()
+        return checked, mismatched
+    except Exception:
+        # set_session is refused inside an aborted transaction and would hide this error
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+
+
+def repair_users(conn: Any, user_ids: List[int]) -> List[int]:
+    '''
+    Rebuild each drifted user's rows with reminder_stats_rebuild, one short
+    transaction per user. A concurrent write to the same rows can make the
+    rebuild fail; that user is rolled back and left for the next run.
+    Returns the repaired user ids.
+    '''
+    import psycopg2
+    
+    repaired = []
+    cur = conn.cursor()
+    try:
+        for user_id in user_ids:
+            try:
+                cur.execute("SELECT reminder_stats_rebuild(%s)", (user_id,))
+                conn.commit()
+                repaired.append(user_id)
+            except psycopg2.Error:
+                conn.rollback()
+        return repaired
+    finally:
+        cur.close()
+
+
+def admin_authorized(headers: Dict[str, Any]) -> bool:
+    '''Timer triggers and operators pass ADMIN_TOKEN in X-Admin-Token; while it is unset nobody is let in'''
+    expected = os.environ.get('ADMIN_TOKEN')
+    supplied = headers.get('X-Admin-Token') or headers.get('x-admin-token')
+    if not expected or not isinstance(supplied, str):
+        return False
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'POST')
+    
+    # Handle CORS OPTIONS request
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Admin-Token',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': '',
+            'isBase64Encoded': False
+        }
+    
+    if not admin_authorized(event.get('headers') or {}):
+        return {
+            'statusCode': 403,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Admin token required'}),
+            'isBase64Encoded': False
+        }
+    
+    params = event.get('queryStringParameters') or {}
+    repair = params.get('repair') in ('true', '1')
+    
+    try:
+        user_id = int(params['user_id']) if params.get('user_id') else None
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'user_id must be an integer'}),
+            'isBase64Encoded': False
+        }
+    
+    repaired: List[int] = []
+    conn = db_pool.getconn()
+    try:
+        checked, mismatched = find_mismatches(conn, user_id)
+        if repair and mismatched:
+            repaired = repair_users(conn, mismatched)
+    finally:
+        db_pool.putconn(conn)
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'checked': checked,
+            'mismatched': mismatched,
+            'repaired': repaired,
+            'db_pool': db_pool.stats()
+        }),
+        'isBase64Encoded': False
+    }
@@ -4,39 +4,1183 @@ Args: event - dict with httpMethod, body, queryStringParameters, headers (X-Auth
       context - object with request_id attribute
 Returns: HTTP response with reminder data
 '''
+import base64
+import hashlib
 import json
 import os
-from typing import Dict, Any, Optional
-import psycopg2
-import jwt
+import re
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from random import random
+from time import monotonic, perf_counter, time as current_timestamp
+from typing import Dict, Any, Callable, Iterator, Optional, List, Tuple
 from datetime import datetime, date, time
-from pydantic import BaseModel, Field, ValidationError
 
 
-class ReminderCreate(BaseModel):
-    title: str = Field(..., min_length=1, max_length=255)
-    description: Optional[str] = None
-    date: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
-    time: str = Field(..., pattern=r'^\d{2}:\d{2}$')
-    frequency: str = Field(..., pattern=r'^(once|daily|weekly|monthly|yearly)$')
+@lru_cache(maxsize=None)
+def request_models() -> Tuple[Any, Any]:
+    '''
+    Build the pydantic request models on first use. Importing pydantic and
+    compiling the validators dominates cold start, and OPTIONS preflights
+    and GET requests never need them.
+    '''
+    from pydantic import BaseModel, Field
 
+    class ReminderCreate(BaseModel):
+        title: str = Field(..., min_length=1, max_length=255)
+        description: Optional[str] = None
+        date: str = Field(..., pattern=r'^\d{4}-\d{2}-\d{2}$')
+        time: str = Field(..., pattern=r'^\d{2}:\d{2}$')
+        frequency: str = Field(..., pattern=r'^(once|daily|weekly|monthly|yearly)$')
 
-class ReminderUpdate(BaseModel):
-    title: Optional[str] = Field(None, min_length=1, max_length=255)
-    description: Optional[str] = None
-    date: Optional[str] = Field(None, pattern=r'^\d{4}-\d{2}-\d{2}$')
-    time: Optional[str] = Field(None, pattern=r'^\d{2}:\d{2}$')
-    frequency: Optional[str] = Field(None, pattern=r'^(once|daily|weekly|monthly|yearly)$')
-    is_active: Optional[bool] = None
+    class ReminderUpdate(BaseModel):
+        title: Optional[str] = Field(None, min_length=1, max_length=255)
+        description: Optional[str] = None
+        date: Optional[str] = Field(None, pattern=r'^\d{4}-\d{2}-\d{2}$')
+        time: Optional[str] = Field(None, pattern=r'^\d{2}:\d{2}$')
+        frequency: Optional[str] = Field(None, pattern=r'^(once|daily|weekly|monthly|yearly)$')
+        is_active: Optional[bool] = None
+
+    return ReminderCreate, ReminderUpdate
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+PLACEHOLDER_RE = re.compile(r'%([s%])')
+
+
+def server_placeholders(sql: str) -> Tuple[str, int]:
+    '''Rewrite psycopg2 %s placeholders as PREPARE's $1..$n; returns the text and the parameter count'''
+    count = 0
+
+    def replace(match: Any) -> str:
+        nonlocal count
+        if match.group(1) == '%':
+            return '%'
+        count += 1
+        return f'${count}'
+
+    return PLACEHOLDER_RE.sub(replace, sql), count
+
+
+class PreparedStatementCache:
+    '''
+    Server-side prepared statements for the fixed query shapes, remembered
+    per pooled connection so warm invocations skip parse and plan. A shape
+    is its SQL text, which for the dynamic UPDATE is the set of fields being
+    set. Each connection keeps at most max_per_connection statements and
+    DEALLOCATEs the least recently used. PREPARE is not transactional, so a
+    rollback never loses a statement the cache still lists. Disable with
+    PREPARED_STATEMENTS=false behind a transaction-pooling proxy.
+    '''
+
+    def __init__(self, max_per_connection: int = 128, enabled: bool = True):
+        self.max_per_connection = max_per_connection
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._statements: 'weakref.WeakKeyDictionary[Any, OrderedDict[str, Tuple[str, int]]]' = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def execute(self, cur: Any, sql: str, params: Any = ()) -> None:
+        import psycopg2.errors
+
+        if not self.enabled:
+            cur.execute(sql, params)
+            return
+
+        # A connection is only ever used by the thread that checked it out,
+        # so its own statement list needs no lock
+        with self._lock:
+            prepared = self._statements.get(cur.connection)
+            if prepared is None:
+                prepared = self._statements[cur.connection] = OrderedDict()
+            entry = prepared.get(sql)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if entry is None:
+            if len(prepared) >= self.max_per_connection:
+                _, (stale_name, _) = prepared.popitem(last=False)
+                cur.execute(f'DEALLOCATE {stale_name}')
+                with self._lock:
+                    self.evictions += 1
+            text, count = server_placeholders(sql)
+            entry = (f'reminders_{hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]}', count)
+            cur.execute(f'PREPARE {entry[0]} AS {text}')
+            prepared[sql] = entry
+        else:
+            prepared.move_to_end(sql)
+
+        name, count = entry
+        try:
+            cur.execute(f'EXECUTE {name} ({", ".join(["%s"] * count)})' if count else f'EXECUTE {name}', params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Something ran DISCARD ALL on the session; start its list over
+            prepared.clear()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'connections': len(self._statements),
+                'statements': sum(len(prepared) for prepared in self._statements.values())
+            }
+
+
+prepared_statements = PreparedStatementCache(
+    max_per_connection=int(os.environ.get('PREPARED_STATEMENTS_PER_CONNECTION', '128')),
+    enabled=os.environ.get('PREPARED_STATEMENTS', 'true').lower() != 'false'
+)
+
+
+class TokenCache:
+    '''
+    Bounded LRU of already verified JWTs keyed by a digest of the token.
+    Each entry expires at the token's own exp claim, so a cached token
+    is never accepted after the moment jwt.decode would reject it.
+    '''
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[bytes, Tuple[int, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, expires_at = entry
+            if current_timestamp() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user_id
+
+    def put(self, key: bytes, user_id: int, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
+
+class MemoryListCache:
+    '''
+    Per-process LRU of serialized list pages, bounded by total body size and
+    entry age. Entries are keyed by user and list ETag; since the ETag carries
+    the user's reminders_version, a page is never served after a write from
+    any instance, and invalidate() only frees the user's dead entries early.
+    '''
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: 'OrderedDict[Tuple[int, str], Tuple[str, float]]' = OrderedDict()
+        self._keys_by_user: Dict[int, set] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, entry_key: Tuple[int, str]) -> None:
+        body, _ = self._entries.pop(entry_key)
+        self._bytes -= len(body)
+        user_keys = self._keys_by_user.get(entry_key[0])
+        if user_keys is not None:
+            user_keys.discard(entry_key[1])
+            if not user_keys:
+                del self._keys_by_user[entry_key[0]]
+
+    def get(self, user_id: int, key: str) -> Optional[str]:
+        entry_key = (user_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if monotonic() >= entry[1]:
+                self._remove(entry_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_id: int, key: str, body: str) -> None:
+        if len(body) > self.max_bytes:
+            return
+        entry_key = (user_id, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            self._entries[entry_key] = (body, monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove((user_id, key))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+class RedisListCache:
+    '''
+    The same interface over a Redis-compatible server, so several instances
+    share one cache. Each user's pages live in one hash that expires ttl
+    seconds after its last write, and invalidate() drops it with a single DEL;
+    the size bound and LRU eviction are the server's maxmemory settings.
+    A cache outage degrades to misses and never fails the request.
+    '''
+
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = 'reminders:list:'):
+        self.url = url
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def client(self) -> Any:
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        return self._client
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, user_id: int, key: str) -> Optional[str]:
+        import redis
+
+        try:
+            body = self.client().hget(f'{self.prefix}{user_id}', key)
+        except redis.RedisError:
+            self._count('errors')
+            return None
+        self._count('misses' if body is None else 'hits')
+        return body.decode('utf-8') if body is not None else None
+
+    def put(self, user_id: int, key: str, body: str) -> None:
+        import redis
+
+        name = f'{self.prefix}{user_id}'
+        try:
+            pipe = self.client().pipeline(transaction=False)
+            pipe.hset(name, key, body)
+            pipe.expire(name, int(self.ttl) or 1)
+            pipe.execute()
+        except redis.RedisError:
+            self._count('errors')
+
+    def invalidate(self, user_id: int) -> None:
+        import redis
+
+        try:
+            self.client().delete(f'{self.prefix}{user_id}')
+        except redis.RedisError:
+            self._count('errors')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'errors': self.errors
+            }
+
+
+def make_list_cache() -> Any:
+    '''REMINDERS_CACHE_URL=redis://... selects the shared backend, otherwise pages are cached in-process'''
+    ttl = float(os.environ.get('REMINDERS_CACHE_TTL', '300'))
+    url = os.environ.get('REMINDERS_CACHE_URL', '')
+    if url:
+        return RedisListCache(url, ttl=ttl)
+    return MemoryListCache(max_bytes=int(os.environ.get('REMINDERS_CACHE_MAX_BYTES', str(16 * 1024 * 1024))), ttl=ttl)
+
+
+JWT_SECRET = os.environ.get('JWT_SECRET', 'default-secret-key')
+token_cache = TokenCache(max_size=int(os.environ.get('TOKEN_CACHE_SIZE', '1024')))
+list_cache = make_list_cache()
 
 
 def verify_token(token: str) -> Optional[int]:
-    jwt_secret = os.environ.get('JWT_SECRET', 'default-secret-key')
-    payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
-    return payload.get('user_id')
+    '''Return the token's user id, or None if it is expired, forged or malformed'''
+    import jwt
+    
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+    
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+    
+    user_id = payload.get('user_id')
+    # Tokens without exp are still accepted but never cached
+    if user_id is not None and 'exp' in payload:
+        token_cache.put(key, user_id, float(payload['exp']))
+    return user_id
+
+
+DEFAULT_PAGE_LIMIT = 100
+DEFAULT_SEARCH_LIMIT = 20
+MAX_PAGE_LIMIT = 500
+MAX_BULK_ITEMS = 1000
+DEFAULT_OCCURRENCE_LIMIT = 1000
+MAX_OCCURRENCE_LIMIT = 10000
+MAX_OCCURRENCE_WINDOW_DAYS = 366
+OCCURRENCE_FETCH_SIZE = 500
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', '5'))
+
+# 'server' has Postgres render each list row as JSON text so Python only joins
+# strings; 'python' fetches tuples and serializes them here
+JSON_MODE = os.environ.get('REMINDERS_JSON_MODE', 'server')
+LIST_COLUMNS = {
+    'python': "id, title, description, date, time, frequency, is_active, created_at",
+    'server': "json_build_object('id', id, 'title', title, 'description', description, 'date', date, 'time', to_char(time, 'HH24:MI'), 'frequency', frequency, 'is_active', is_active, 'created_at', created_at)::text, date, time, id"
+}
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Stands in for the reminders table when a view asks for include_archived:
+# live and soft-deleted rows plus reminders_archive, where every row is inactive
+REMINDERS_WITH_ARCHIVE = """(
+    SELECT id, user_id, title, description, date, time, frequency, is_active, created_at, updated_at, search_vector
+    FROM reminders WHERE user_id = %s
+    UNION ALL
+    SELECT id, user_id, title, description, date, time, frequency, false, created_at, updated_at,
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    FROM reminders_archive WHERE user_id = %s
+) reminders"""
+
+
+def reminders_source(user_id: int, include_archived: bool) -> Tuple[str, List[Any], List[str]]:
+    '''
+    FROM item, its parameters and the row conditions for a list view. By
+    default only live rows are read, which idx_reminders_live_user_date_time_id
+    covers; archived views read everything the user ever had.
+    '''
+    if include_archived:
+        return REMINDERS_WITH_ARCHIVE, [user_id, user_id], ['user_id = %s']
+    return 'reminders', [], ['user_id = %s', 'is_active = true']
+
+
+def pack_token(values: List[Any]) -> str:
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def unpack_token(token: str) -> Any:
+    padded = token + '=' * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+
+
+def encode_cursor(reminder_date: date, reminder_time: time, reminder_id: int) -> str:
+    '''Opaque keyset cursor over the (date, time, id) sort key'''
+    return pack_token([reminder_date.isoformat(), reminder_time.isoformat(), reminder_id])
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[date, time, int]]:
+    try:
+        raw_date, raw_time, reminder_id = unpack_token(cursor)
+        return date.fromisoformat(raw_date), time.fromisoformat(raw_time), int(reminder_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def encode_watermark(updated_at: datetime, reminder_id: int) -> str:
+    '''Opaque delta-sync position over the (updated_at, id) sort key'''
+    return pack_token([updated_at.isoformat(), reminder_id])
+
+
+def parse_local_datetime(raw: str) -> datetime:
+    '''
+    ISO timestamp in the server's local time, the way reminders and
+    updated_at are stored. Offsets are rejected with ValueError: they cannot
+    be compared with naive values nor with TIMESTAMP columns.
+    '''
+    value = datetime.fromisoformat(raw)
+    if value.tzinfo is not None:
+        raise ValueError('timestamp must not carry a UTC offset')
+    return value
+
+
+def decode_watermark(watermark: str) -> Optional[Tuple[datetime, int]]:
+    # A plain ISO timestamp is accepted too, so a client can start from any point
+    try:
+        return parse_local_datetime(watermark), 0
+    except ValueError:
+        pass
+    try:
+        raw_updated_at, reminder_id = unpack_token(watermark)
+        return parse_local_datetime(raw_updated_at), int(reminder_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_limit(raw_limit: Optional[str], default: int = DEFAULT_PAGE_LIMIT, maximum: int = MAX_PAGE_LIMIT) -> Optional[int]:
+    if raw_limit is None or raw_limit == '':
+        return default
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        return None
+    if limit < 1:
+        return None
+    return min(limit, maximum)
+
+
+def build_search_query(search: str) -> Optional[str]:
+    '''
+    Turn free-form input into a to_tsquery expression where every word
+    must match as a prefix, so "doc app" finds "Doctor appointment".
+    Only word characters survive, which keeps tsquery operators out.
+    '''
+    terms = SEARCH_TERM_RE.findall(search.lower())
+    if not terms:
+        return None
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def get_action(event: Dict[str, Any]) -> str:
+    '''Sub-resource from ?action=... or the last path segment, e.g. /bulk'''
+    params = event.get('queryStringParameters') or {}
+    if params.get('action'):
+        return params['action']
+    return (event.get('path') or '').rstrip('/').rsplit('/', 1)[-1]
+
+
+def apply_bulk(cur: Any, user_id: int, body_data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    '''
+    Validate and apply bulk creates, updates and deletes with one statement
+    per kind. Invalid items are reported and skipped; the caller commits
+    the valid ones as a single transaction.
+    '''
+    from psycopg2.extras import execute_values
+    from pydantic import ValidationError
+    
+    ReminderCreate, ReminderUpdate = request_models()
+    outcomes: Dict[str, List[Dict[str, Any]]] = {'creates': [], 'updates': [], 'deletes': []}
+    
+    # Creates - one multi-row INSERT
+    valid_creates = []
+    for index, item in enumerate(body_data.get('creates') or []):
+        try:
+            valid_creates.append((index, ReminderCreate.model_validate(item)))
+        except ValidationError as e:
+            outcomes['creates'].append({'index': index, 'status': 'invalid', 'error': e.errors()[0]['msg']})
+    
+    if valid_creates:
+        created = execute_values(
+            cur,
+            "INSERT INTO reminders (user_id, title, description, date, time, frequency, next_fire_at, updated_at) VALUES %s RETURNING id",
+            [(user_id, r.title, r.description, r.date, r.time, r.frequency, r.date, r.time, r.frequency) for _, r in valid_creates],
+            template='(%s, %s, %s, %s, %s, %s, reminder_next_fire_at(%s::date, %s::time, %s, LOCALTIMESTAMP), CURRENT_TIMESTAMP)',
+            page_size=len(valid_creates),
+            fetch=True
+        )
+        for (index, _), row in zip(valid_creates, created):
+            outcomes['creates'].append({'index': index, 'status': 'created', 'id': row[0]})
+    
+    # Updates - one UPDATE joined against a VALUES list; NULL means "keep"
+    valid_updates = []
+    seen_ids = set()
+    for index, item in enumerate(body_data.get('updates') or []):
+        reminder_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(reminder_id, int) or isinstance(reminder_id, bool) or reminder_id in seen_ids:
+            outcomes['updates'].append({'index': index, 'status': 'invalid', 'error': 'Each update needs a unique integer id'})
+            continue
+        try:
+            update_data = ReminderUpdate.model_validate({k: v for k, v in item.items() if k != 'id'})
+        except ValidationError as e:
+            outcomes['updates'].append({'index': index, 'status': 'invalid', 'error': e.errors()[0]['msg']})
+            continue
+        if not update_data.model_dump(exclude_none=True):
+            outcomes['updates'].append({'index': index, 'status': 'invalid', 'error': 'No fields to update'})
+            continue
+        seen_ids.add(reminder_id)
+        valid_updates.append((index, reminder_id, update_data))
+    
+    if valid_updates:
+        updated = execute_values(
+            cur,
+            """UPDATE reminders r SET
+                title = COALESCE(v.title, r.title),
+                description = COALESCE(v.description, r.description),
+                date = COALESCE(v.date, r.date),
+                time = COALESCE(v.time, r.time),
+                frequency = COALESCE(v.frequency, r.frequency),
+                is_active = COALESCE(v.is_active, r.is_active),
+                next_fire_at = CASE
+                    WHEN v.date IS NULL AND v.time IS NULL AND v.frequency IS NULL AND v.is_active IS NULL THEN r.next_fire_at
+                    ELSE reminder_next_fire_at(COALESCE(v.date, r.date), COALESCE(v.time, r.time), COALESCE(v.frequency, r.frequency), LOCALTIMESTAMP)
+                END,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v(user_id, id, title, description, date, time, frequency, is_active)
+            WHERE r.user_id = v.user_id AND r.id = v.id
+            RETURNING r.id""",
+            [(user_id, reminder_id, u.title, u.description, u.date, u.time, u.frequency, u.is_active) for _, reminder_id, u in valid_updates],
+            template='(%s::int, %s::int, %s::varchar, %s::text, %s::date, %s::time, %s::varchar, %s::boolean)',
+            page_size=len(valid_updates),
+            fetch=True
+        )
+        updated_ids = {row[0] for row in updated}
+        for index, reminder_id, _ in valid_updates:
+            status = 'updated' if reminder_id in updated_ids else 'not_found'
+            outcomes['updates'].append({'index': index, 'status': status, 'id': reminder_id})
+    
+    # Deletes - one soft-delete UPDATE over the id list
+    delete_ids = []
+    for index, reminder_id in enumerate(body_data.get('deletes') or []):
+        if not isinstance(reminder_id, int) or isinstance(reminder_id, bool):
+            outcomes['deletes'].append({'index': index, 'status': 'invalid', 'error': 'Reminder id must be an integer'})
+            continue
+        delete_ids.append((index, reminder_id))
+    
+    if delete_ids:
+        prepared_statements.execute(
+            cur,
+            "UPDATE reminders SET is_active = false, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s AND id = ANY(%s) RETURNING id",
+            (user_id, [reminder_id for _, reminder_id in delete_ids])
+        )
+        deleted_ids = {row[0] for row in cur.fetchall()}
+        for index, reminder_id in delete_ids:
+            status = 'deleted' if reminder_id in deleted_ids else 'not_found'
+            outcomes['deletes'].append({'index': index, 'status': status, 'id': reminder_id})
+    
+    for items in outcomes.values():
+        items.sort(key=lambda outcome: outcome['index'])
+    return outcomes
+
+
+def list_row_key(row: Tuple, mode: str) -> Tuple[date, time, int]:
+    '''(date, time, id) sort key of a row selected with LIST_COLUMNS[mode]'''
+    if mode == 'server':
+        return row[1], row[2], row[3]
+    return row[3], row[4], row[0]
+
+
+def render_reminders(rows: List[Tuple], mode: str) -> str:
+    '''JSON array text for rows selected with LIST_COLUMNS[mode]'''
+    if mode == 'server':
+        return '[' + ','.join(r[0] for r in rows) + ']'
+    return json.dumps([
+        {
+            'id': r[0],
+            'title': r[1],
+            'description': r[2],
+            'date': r[3].isoformat(),
+            'time': r[4].strftime('%H:%M'),
+            'frequency': r[5],
+            'is_active': r[6],
+            'created_at': r[7].isoformat()
+        }
+        for r in rows
+    ])
+
+
+def parse_window(params: Dict[str, Any]) -> Optional[Tuple[datetime, datetime]]:
+    '''
+    Calendar window from ISO from/to parameters. A bare date in to covers
+    that whole day. Returns None when the window is missing, carries a UTC
+    offset, is inverted or longer than MAX_OCCURRENCE_WINDOW_DAYS.
+    '''
+    try:
+        window_from = parse_local_datetime(params.get('from') or '')
+        raw_to = params.get('to') or ''
+        window_to = parse_local_datetime(raw_to)
+    except ValueError:
+        return None
+    if len(raw_to) == 10:
+        window_to = window_to.replace(hour=23, minute=59, second=59)
+    if window_to < window_from or (window_to - window_from).days > MAX_OCCURRENCE_WINDOW_DAYS:
+        return None
+    return window_from, window_to
+
+
+def stream_occurrences(conn: Any, user_id: int, window_from: datetime, window_to: datetime, limit: int) -> Tuple[List[str], bool]:
+    '''
+    Expand every active series of the user inside the window in one set-based
+    query and read it through a named server-side cursor in fixed-size chunks.
+    Postgres renders each occurrence as JSON text, so memory stays bounded by
+    limit and the chunk size rather than by the number of reminders.
+    '''
+    named_cur = conn.cursor(name='reminder_occurrences')
+    named_cur.itersize = OCCURRENCE_FETCH_SIZE
+    try:
+        named_cur.execute(
+            """SELECT json_build_object('reminder_id', r.id, 'title', r.title, 'frequency', r.frequency, 'date', o.occurs_at::date, 'time', to_char(o.occurs_at, 'HH24:MI'))::text
+            FROM reminders r, reminder_occurrences(r.date, r.time, r.frequency, %s, %s) o
+            WHERE r.user_id = %s AND r.is_active = true
+            ORDER BY o.occurs_at, r.id
+            LIMIT %s""",
+            (window_from, window_to, user_id, limit + 1)
+        )
+        chunks = []
+        for row in named_cur:
+            chunks.append(row[0])
+        truncated = len(chunks) > limit
+        return chunks[:limit], truncated
+    finally:
+        named_cur.close()
+
+
+def reminder_rrule(reminder_date: date, frequency: str) -> Optional[str]:
+    '''
+    RRULE equivalent of reminder_next_fire_at. Postgres month arithmetic clamps
+    the 29th-31st to the last day of shorter months, where a plain RRULE would
+    skip those months, so such series pick the earlier of that day and the last.
+    '''
+    if frequency == 'once':
+        return None
+    rule = f'FREQ={frequency.upper()}'
+    if frequency == 'monthly' and reminder_date.day > 28:
+        rule += f';BYMONTHDAY={reminder_date.day},-1;BYSETPOS=1'
+    elif frequency == 'yearly' and (reminder_date.month, reminder_date.day) == (2, 29):
+        rule += ';BYMONTH=2;BYMONTHDAY=29,-1;BYSETPOS=1'
+    return rule
+
+
+def ics_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def ics_line(line: str) -> str:
+    '''Content line folded at 75 octets (RFC 5545 3.1) without splitting a UTF-8 sequence'''
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    start, width = 0, 75
+    while start < len(encoded):
+        end = min(start + width, len(encoded))
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        # Continuation lines spend one octet on the leading space
+        start, width = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_event(row: Tuple) -> str:
+    reminder_id, title, description, reminder_date, reminder_time, frequency, is_active, stamp = row
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:reminder-{reminder_id}@remindme',
+        f'DTSTAMP:{stamp}',
+        # Reminders carry no time zone, so DTSTART is floating local time
+        f'DTSTART:{reminder_date.strftime("%Y%m%d")}T{reminder_time.strftime("%H%M%S")}',
+        f'SUMMARY:{ics_escape(title)}'
+    ]
+    rrule = reminder_rrule(reminder_date, frequency)
+    if rrule:
+        lines.append(f'RRULE:{rrule}')
+    if description:
+        lines.append(f'DESCRIPTION:{ics_escape(description)}')
+    if not is_active:
+        lines.append('STATUS:CANCELLED')
+    lines += ['BEGIN:VALARM', 'ACTION:DISPLAY', f'DESCRIPTION:{ics_escape(title)}', 'TRIGGER:PT0S', 'END:VALARM', 'END:VEVENT']
+    return ''.join(ics_line(line) for line in lines)
+
+
+EXPORT_FETCH_SIZE = 500
+EXPORT_FORMATS = {
+    'ics': ('text/calendar; charset=utf-8', 'reminders.ics'),
+    'csv': ('text/csv; charset=utf-8', 'reminders.csv')
+}
+# DTSTAMP must be UTC; updated_at holds session-local CURRENT_TIMESTAMP, which the cast to timestamptz restores
+EXPORT_COLUMNS = {
+    'ics': """id, title, description, date, time, frequency, is_active, to_char(updated_at::timestamptz AT TIME ZONE 'UTC', 'YYYYMMDD"T"HH24MISS"Z"')""",
+    'csv': "id, title, description, date, to_char(time, 'HH24:MI'), frequency, is_active, created_at, updated_at"
+}
+CSV_HEADER = ['id', 'title', 'description', 'date', 'time', 'frequency', 'is_active', 'created_at', 'updated_at']
+# The gateway takes the response body in one piece, so the export is built in
+# memory; past this many body bytes it is refused rather than grown further
+EXPORT_MAX_BYTES = int(os.environ.get('EXPORT_MAX_BYTES', str(6 * 1024 * 1024)))
+
+
+class ExportTooLarge(Exception):
+    pass
+
+
+def export_chunks(conn: Any, user_id: int, export_format: str, include_archived: bool = False) -> Iterator[str]:
+    '''
+    Yield the user's reminders rendered as ics or csv text, one chunk per
+    EXPORT_FETCH_SIZE rows read from a named server-side cursor, so rows are
+    never all fetched at once. The rendered body still accumulates in
+    encode_export, which bounds it.
+    '''
+    import csv
+    import io
+
+    source, source_values, conditions = reminders_source(user_id, include_archived)
+    named_cur = conn.cursor(name='reminder_export')
+    try:
+        named_cur.execute(
+            f"SELECT {EXPORT_COLUMNS[export_format]} FROM {source} WHERE {' AND '.join(conditions)} ORDER BY date, time, id",
+            [*source_values, user_id]
+        )
+        if export_format == 'ics':
+            yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//RemindMe//Reminders export//EN\r\nCALSCALE:GREGORIAN\r\n'
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # The byte order mark makes spreadsheet apps read the file as UTF-8
+            buffer.write('\ufeff')
+            writer.writerow(CSV_HEADER)
+
+        while True:
+            rows = named_cur.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            if export_format == 'ics':
+                yield ''.join(ics_event(row) for row in rows)
+            else:
+                writer.writerows(
+                    (r[0], r[1], r[2] or '', r[3].isoformat(), r[4], r[5], 'true' if r[6] else 'false', r[7].isoformat(), r[8].isoformat())
+                    for r in rows
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if export_format == 'ics':
+            yield 'END:VCALENDAR\r\n'
+        elif buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        named_cur.close()
+
+
+def encode_export(chunks: Iterator[str], compress: bool, max_bytes: int = EXPORT_MAX_BYTES) -> Tuple[str, bool]:
+    '''
+    Response body and isBase64Encoded flag for the export. With compress each
+    chunk goes through the gzip stream as it is produced, so only the much
+    smaller compressed body accumulates. Either way the whole body is held in
+    memory, so ExportTooLarge is raised as soon as it would exceed max_bytes
+    (counted after base64 for the compressed body), before more rows are read.
+    '''
+    size = 0
+    if not compress:
+        parts = []
+        for chunk in chunks:
+            size += len(chunk.encode('utf-8'))
+            if size > max_bytes:
+                raise ExportTooLarge()
+            parts.append(chunk)
+        return ''.join(parts), False
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    compressed = []
+    for part in (compressor.compress(chunk.encode('utf-8')) for chunk in chunks):
+        size += len(part)
+        if (size + 2) // 3 * 4 > max_bytes:
+            raise ExportTooLarge()
+        compressed.append(part)
+    compressed.append(compressor.flush())
+    if (size + len(compressed[-1]) + 2) // 3 * 4 > max_bytes:
+        raise ExportTooLarge()
+    return base64.b64encode(b''.join(compressed)).decode('ascii'), True
+
+
+STATS_FREQUENCIES = ('once', 'daily', 'weekly', 'monthly', 'yearly')
+
+
+def read_stats(cur: Any, user_id: int) -> Dict[str, Any]:
+    '''
+    The user's counters from reminder_stats plus the due-day buckets between
+    today and Sunday, which triggers on reminders keep current (see V0010).
+    Two primary-key lookups however many reminders the user has. Due counts
+    are by next occurrence, so a daily reminder that already fired today
+    counts toward tomorrow.
+    '''
+    prepared_statements.execute(
+        cur,
+        """SELECT s.active, s.inactive, s.once, s.daily, s.weekly, s.monthly, s.yearly,
+                  coalesce(d.today, 0), coalesce(d.this_week, 0)
+           FROM (
+               SELECT sum(reminders) FILTER (WHERE day = CURRENT_DATE) AS today, sum(reminders) AS this_week
+               FROM reminder_stats_days
+               WHERE user_id = %s AND day BETWEEN CURRENT_DATE AND date_trunc('week', CURRENT_DATE)::date + 6
+           ) d
+           LEFT JOIN reminder_stats s ON s.user_id = %s""",
+        (user_id, user_id)
+    )
+    row = cur.fetchone()
+    counts = [value or 0 for value in row]
+    return {
+        'active': counts[0],
+        'inactive': counts[1],
+        'by_frequency': dict(zip(STATS_FREQUENCIES, counts[2:7])),
+        'due_today': int(counts[7]),
+        'due_this_week': int(counts[8])
+    }
+
+
+def bump_reminders_version(cur: Any, user_id: int) -> None:
+    '''Invalidate the user's list ETag; runs inside the writing transaction'''
+    prepared_statements.execute(cur, "UPDATE users SET reminders_version = reminders_version + 1 WHERE id = %s", (user_id,))
+
+
+def list_etag(version: int, params: Dict[str, Any], action: str = '') -> str:
+    '''Weak ETag for one list view: the user's version plus the query that shaped it'''
+    view = json.dumps({'action': action, **{k: params.get(k) for k in ('search', 'limit', 'after', 'since', 'from', 'to', 'format', 'include_archived')}}, sort_keys=True)
+    return f'W/"{version}-{hashlib.sha256(view.encode("utf-8")).hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison: W/ prefixes are ignored on both sides
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in candidates
+
+
+# Response compression: bodies of at least COMPRESS_MIN_BYTES are encoded with
+# the best coding the client accepts; levels trade CPU for bytes on the wire
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+
+@lru_cache(maxsize=None)
+def brotli_module() -> Any:
+    '''The brotli package if it is installed; without it only gzip is offered'''
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate_encoding(headers: Dict[str, Any], supported: Tuple[str, ...] = ('br', 'gzip')) -> Optional[str]:
+    '''Preferred content coding from Accept-Encoding among supported, in order of preference on q ties'''
+    accept = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    weights: Dict[str, float] = {}
+    for item in accept.split(','):
+        coding, _, quality = item.strip().partition(';')
+        try:
+            weights[coding.strip().lower()] = float(quality.strip().removeprefix('q=') or '1')
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for coding in supported:
+        if coding == 'br' and brotli_module() is None:
+            continue
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress_response(response: Dict[str, Any], headers: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Encode a large text body with gzip or brotli in place, returned base64 as
+    the gateway requires. Bodies that are already binary or encoded, small,
+    or would not shrink are left alone.
+    '''
+    body = response.get('body')
+    response_headers = response.setdefault('headers', {})
+    if response.get('isBase64Encoded') or 'Content-Encoding' in response_headers or not isinstance(body, str) or len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    vary = response_headers.get('Vary')
+    if not vary:
+        response_headers['Vary'] = 'Accept-Encoding'
+    elif 'Accept-Encoding' not in vary:
+        response_headers['Vary'] = f'{vary}, Accept-Encoding'
+    encoding = negotiate_encoding(headers)
+    if encoding is None:
+        return response
+
+    raw = body.encode('utf-8')
+    if encoding == 'br':
+        compressed = brotli_module().compress(raw, quality=BROTLI_QUALITY)
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compressed = compressor.compress(raw) + compressor.flush()
+    if len(compressed) >= len(raw):
+        return response
+
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    response_headers['Content-Encoding'] = encoding
+    return response
+
+
+TIMING_LOG_SAMPLE_RATE = float(os.environ.get('TIMING_LOG_SAMPLE_RATE', '0.01'))
+
+
+class PhaseTimer:
+    '''
+    Wall-clock time spent in each phase of one invocation. Phases are charged
+    by mark(), which bills everything since the previous mark, so the hot path
+    pays one perf_counter() call per phase. finish() reports the phases in a
+    Server-Timing header and, for a sampled share of requests, as a one-line
+    JSON log keyed by the platform request id, together with the process's
+    pool and cache counters when a counters callable is given.
+    '''
+    
+    def __init__(self, function_name: str, counters: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+        self.function_name = function_name
+        self.counters = counters
+        self.started = self.last = perf_counter()
+        self.phases: Dict[str, float] = {}
+    
+    def mark(self, phase: str) -> None:
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+    
+    def finish(self, response: Optional[Dict[str, Any]], context: Any, method: str) -> None:
+        total_ms = (perf_counter() - self.started) * 1000
+        
+        if response is not None:
+            metrics = [f'{phase};dur={ms:.2f}' for phase, ms in self.phases.items()]
+            metrics.append(f'total;dur={total_ms:.2f}')
+            headers = response.setdefault('headers', {})
+            headers['Server-Timing'] = ', '.join(metrics)
+            headers['Timing-Allow-Origin'] = '*'
+            exposed = headers.get('Access-Control-Expose-Headers')
+            headers['Access-Control-Expose-Headers'] = f'{exposed}, Server-Timing' if exposed else 'Server-Timing'
+        
+        if random() < TIMING_LOG_SAMPLE_RATE:
+            record = {
+                'request_id': getattr(context, 'request_id', None),
+                'function': self.function_name,
+                'method': method,
+                # No response means the handler raised
+                'status': response.get('statusCode') if response is not None else 500,
+                'total_ms': round(total_ms, 2),
+                'phases_ms': {phase: round(ms, 2) for phase, ms in self.phases.items()}
+            }
+            if self.counters is not None:
+                # Cumulative since the process started, so rates come from differences between samples
+                record['counters'] = self.counters()
+            print(json.dumps(record))
+
+
+def runtime_counters() -> Dict[str, Any]:
+    return {
+        'db_pool': db_pool.stats(),
+        'token_cache': token_cache.stats(),
+        'list_cache': list_cache.stats(),
+        'prepared_statements': prepared_statements.stats()
+    }
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    timer = PhaseTimer('reminders', runtime_counters)
+    response = None
+    try:
+        response = compress_response(handle_request(event, context, timer), event.get('headers') or {})
+        timer.mark('compress')
+        return response
+    finally:
+        timer.finish(response, context, event.get('httpMethod', 'GET'))
+
+
+def handle_request(event: Dict[str, Any], context: Any, timer: PhaseTimer) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
     # Handle CORS OPTIONS request
@@ -46,7 +1190,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
+                'Access-Control-Expose-Headers': 'ETag',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
@@ -66,220 +1211,475 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     user_id = verify_token(auth_token)
+    timer.mark('auth')
     
-    # Connect to database
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
-    cur = conn.cursor()
-    
-    # GET - List all reminders for user
-    if method == 'GET':
-        params = event.get('queryStringParameters') or {}
-        search_query = params.get('search', '')
-        
-        if search_query:
-            cur.execute(
-                "SELECT id, title, description, date, time, frequency, is_active, created_at FROM reminders WHERE user_id = %s AND (title ILIKE %s OR description ILIKE %s) ORDER BY date, time",
-                (user_id, f'%{search_query}%', f'%{search_query}%')
-            )
-        else:
-            cur.execute(
-                "SELECT id, title, description, date, time, frequency, is_active, created_at FROM reminders WHERE user_id = %s ORDER BY date, time",
-                (user_id,)
-            )
-        
-        reminders = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        result = [
-            {
-                'id': r[0],
-                'title': r[1],
-                'description': r[2],
-                'date': r[3].isoformat(),
-                'time': r[4].strftime('%H:%M'),
-                'frequency': r[5],
-                'is_active': r[6],
-                'created_at': r[7].isoformat()
-            }
-            for r in reminders
-        ]
-        
+    if user_id is None:
         return {
-            'statusCode': 200,
+            'statusCode': 401,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(result),
+            'body': json.dumps({'error': 'Invalid or expired token'}),
             'isBase64Encoded': False
         }
     
-    # POST - Create new reminder
-    if method == 'POST':
-        body_data = json.loads(event.get('body', '{}'))
-        reminder_data = ReminderCreate(**body_data)
-        
-        cur.execute(
-            "INSERT INTO reminders (user_id, title, description, date, time, frequency) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id, title, description, date, time, frequency, is_active, created_at",
-            (user_id, reminder_data.title, reminder_data.description, reminder_data.date, reminder_data.time, reminder_data.frequency)
-        )
-        new_reminder = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 201,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'id': new_reminder[0],
-                'title': new_reminder[1],
-                'description': new_reminder[2],
-                'date': new_reminder[3].isoformat(),
-                'time': new_reminder[4].strftime('%H:%M'),
-                'frequency': new_reminder[5],
-                'is_active': new_reminder[6],
-                'created_at': new_reminder[7].isoformat()
-            }),
-            'isBase64Encoded': False
-        }
+    action = get_action(event)
     
-    # PUT - Update reminder
-    if method == 'PUT':
-        params = event.get('queryStringParameters') or {}
-        reminder_id = params.get('id')
-        
-        if not reminder_id:
-            cur.close()
-            conn.close()
+    # Take a pooled connection instead of opening a new one per request
+    conn = db_pool.getconn()
+    cur = conn.cursor()
+    timer.mark('connect')
+    try:
+        # GET - List reminders for user, one keyset page at a time
+        if method == 'GET':
+            params = event.get('queryStringParameters') or {}
+            search_query = params.get('search', '')
+            include_archived = params.get('include_archived') in ('true', '1')
+            
+            # GET ?action=stats - Dashboard counters; due counts move with the clock
+            # and the dispatcher, so they bypass the version ETag
+            if action == 'stats':
+                stats = read_stats(cur, user_id)
+                timer.mark('query')
+
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Cache-Control': 'private, no-store'},
+                    'body': json.dumps(stats),
+                    'isBase64Encoded': False
+                }
+
+            # Answer revalidations from the version counter alone, before any list query runs
+            prepared_statements.execute(cur, "SELECT reminders_version FROM users WHERE id = %s", (user_id,))
+            version_row = cur.fetchone()
+            timer.mark('etag')
+            etag = list_etag(version_row[0] if version_row else 0, params, action)
+            cache_headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+            
+            if etag_matches(headers.get('If-None-Match') or headers.get('if-none-match'), etag):
+                return {
+                    'statusCode': 304,
+                    'headers': {'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', **cache_headers},
+                    'body': '',
+                    'isBase64Encoded': False
+                }
+            
+            # GET ?action=occurrences - Concrete occurrences of every series inside a calendar window
+            if action == 'occurrences':
+                window = parse_window(params)
+                limit = parse_limit(params.get('limit'), DEFAULT_OCCURRENCE_LIMIT, MAX_OCCURRENCE_LIMIT)
+                
+                if window is None or limit is None:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': f'from and to must be ISO dates without a UTC offset at most {MAX_OCCURRENCE_WINDOW_DAYS} days apart and limit a positive integer'}),
+                        'isBase64Encoded': False
+                    }
+                
+                occurrences, truncated = stream_occurrences(conn, user_id, window[0], window[1], limit)
+                timer.mark('query')
+                body = f'{{"occurrences": [{",".join(occurrences)}], "truncated": {json.dumps(truncated)}}}'
+                timer.mark('serialize')
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', **cache_headers},
+                    'body': body,
+                    'isBase64Encoded': False
+                }
+            
+            # GET ?action=export - Every reminder as an iCalendar file or CSV download
+            if action == 'export':
+                export_format = params.get('format') or 'ics'
+
+                if export_format not in EXPORT_FORMATS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}),
+                        'isBase64Encoded': False
+                    }
+
+                content_type, filename = EXPORT_FORMATS[export_format]
+                compress = negotiate_encoding(headers, ('gzip',)) == 'gzip'
+                chunks = export_chunks(conn, user_id, export_format, include_archived)
+                try:
+                    body, is_base64 = encode_export(chunks, compress)
+                except ExportTooLarge:
+                    return {
+                        'statusCode': 413,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Vary': 'Accept-Encoding'},
+                        'body': json.dumps({'error': f'Export is larger than {EXPORT_MAX_BYTES} bytes' + ('' if compress else '; request it with Accept-Encoding: gzip')}),
+                        'isBase64Encoded': False
+                    }
+                finally:
+                    # Closes the named cursor when encoding stopped early
+                    chunks.close()
+                timer.mark('export')
+
+                export_headers = {
+                    'Content-Type': content_type,
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'Vary': 'Accept-Encoding',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'ETag, Content-Disposition',
+                    **cache_headers
+                }
+                if compress:
+                    export_headers['Content-Encoding'] = 'gzip'
+
+                return {
+                    'statusCode': 200,
+                    'headers': export_headers,
+                    'body': body,
+                    'isBase64Encoded': is_base64
+                }
+
+            limit = parse_limit(params.get('limit'), DEFAULT_SEARCH_LIMIT if search_query else DEFAULT_PAGE_LIMIT)
+            
+            if limit is None:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': f'limit must be an integer between 1 and {MAX_PAGE_LIMIT}'}),
+                    'isBase64Encoded': False
+                }
+            
+            # Delta sync - rows created, updated or soft-deleted after the watermark
+            if 'since' in params:
+                since_key = decode_watermark(params['since'] or '')
+                
+                if since_key is None:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Invalid watermark'}),
+                        'isBase64Encoded': False
+                    }
+                
+                # Archived rows come back once as inactive tombstones, stamped with
+                # the time they left the reminders table
+                prepared_statements.execute(
+                    cur,
+                    """SELECT id, title, description, date, time, frequency, is_active, created_at, updated_at FROM reminders WHERE user_id = %s AND (updated_at, id) > (%s, %s)
+                    UNION ALL
+                    SELECT id, title, description, date, time, frequency, false, created_at, archived_at FROM reminders_archive WHERE user_id = %s AND (archived_at, id) > (%s, %s)
+                    ORDER BY updated_at, id LIMIT %s""",
+                    (user_id, since_key[0], since_key[1], user_id, since_key[0], since_key[1], limit + 1)
+                )
+                changes = cur.fetchall()
+                has_more = len(changes) > limit
+                changes = changes[:limit]
+                
+                if has_more:
+                    watermark = encode_watermark(changes[-1][8], changes[-1][0])
+                else:
+                    # updated_at is the writer's transaction start, so a slow transaction
+                    # can commit rows older than ones already seen. Once caught up, the
+                    # watermark trails the clock by an overlap window so those rows are
+                    # still picked up; clients upsert by id, so repeats are harmless.
+                    prepared_statements.execute(cur, "SELECT LOCALTIMESTAMP - make_interval(secs => %s)", (SYNC_OVERLAP_SECONDS,))
+                    safe_point = cur.fetchone()[0]
+                    watermark = encode_watermark(safe_point, 0) if safe_point > since_key[0] else encode_watermark(*since_key)
+                timer.mark('query')
+                
+                result = [
+                    {
+                        'id': r[0],
+                        'title': r[1],
+                        'description': r[2],
+                        'date': r[3].isoformat(),
+                        'time': r[4].strftime('%H:%M'),
+                        'frequency': r[5],
+                        'is_active': r[6],
+                        'created_at': r[7].isoformat(),
+                        'updated_at': r[8].isoformat()
+                    }
+                    for r in changes
+                ]
+                body = json.dumps({'reminders': result, 'watermark': watermark, 'has_more': has_more})
+                timer.mark('serialize')
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', **cache_headers},
+                    'body': body,
+                    'isBase64Encoded': False
+                }
+            
+            # The ETag names this exact page at the current version, so a cached body is current
+            cached_body = list_cache.get(user_id, etag)
+            timer.mark('cache')
+            if cached_body is not None:
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', **cache_headers},
+                    'body': cached_body,
+                    'isBase64Encoded': False
+                }
+
+            source, source_values, conditions = reminders_source(user_id, include_archived)
+            
+            # Search returns a single page of the best matches ranked by relevance
+            if search_query:
+                ts_query = build_search_query(search_query)
+                reminders = []
+                if ts_query:
+                    prepared_statements.execute(
+                        cur,
+                        f"SELECT {LIST_COLUMNS[JSON_MODE]} FROM {source}, to_tsquery('simple', %s) query WHERE {' AND '.join(conditions)} AND search_vector @@ query ORDER BY ts_rank(search_vector, query) DESC, date, time, id LIMIT %s",
+                        [*source_values, ts_query, user_id, limit]
+                    )
+                    reminders = cur.fetchall()
+                has_more = False
+            else:
+                query_values: List[Any] = [*source_values, user_id]
+                
+                if params.get('after'):
+                    cursor_key = decode_cursor(params['after'])
+                    if cursor_key is None:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'Invalid cursor'}),
+                            'isBase64Encoded': False
+                        }
+                    # Row comparison lets Postgres seek idx_reminders_live_user_date_time_id
+                    conditions.append('(date, time, id) > (%s, %s, %s)')
+                    query_values.extend(cursor_key)
+                
+                # Fetch one extra row to learn whether another page exists
+                query_values.append(limit + 1)
+                prepared_statements.execute(
+                    cur,
+                    f"SELECT {LIST_COLUMNS[JSON_MODE]} FROM {source} WHERE {' AND '.join(conditions)} ORDER BY date, time, id LIMIT %s",
+                    query_values
+                )
+                
+                reminders = cur.fetchall()
+                has_more = len(reminders) > limit
+                reminders = reminders[:limit]
+            
+            timer.mark('query')
+            
+            next_cursor = encode_cursor(*list_row_key(reminders[-1], JSON_MODE)) if has_more else None
+            body = f'{{"reminders": {render_reminders(reminders, JSON_MODE)}, "next_cursor": {json.dumps(next_cursor)}}}'
+            list_cache.put(user_id, etag, body)
+            timer.mark('serialize')
+
             return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Reminder id is required'}),
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', **cache_headers},
+                'body': body,
                 'isBase64Encoded': False
             }
         
-        body_data = json.loads(event.get('body', '{}'))
-        update_data = ReminderUpdate(**body_data)
-        
-        # Build dynamic update query
-        update_fields = []
-        update_values = []
-        
-        if update_data.title is not None:
-            update_fields.append('title = %s')
-            update_values.append(update_data.title)
-        if update_data.description is not None:
-            update_fields.append('description = %s')
-            update_values.append(update_data.description)
-        if update_data.date is not None:
-            update_fields.append('date = %s')
-            update_values.append(update_data.date)
-        if update_data.time is not None:
-            update_fields.append('time = %s')
-            update_values.append(update_data.time)
-        if update_data.frequency is not None:
-            update_fields.append('frequency = %s')
-            update_values.append(update_data.frequency)
-        if update_data.is_active is not None:
-            update_fields.append('is_active = %s')
-            update_values.append(update_data.is_active)
-        
-        if not update_fields:
-            cur.close()
-            conn.close()
+        # POST ?action=bulk - Apply many creates, updates and deletes in one transaction
+        if method == 'POST' and action == 'bulk':
+            body_data = json.loads(event.get('body') or '{}')
+            kinds = [body_data.get(kind) or [] for kind in ('creates', 'updates', 'deletes')] if isinstance(body_data, dict) else None
+            
+            if kinds is None or not all(isinstance(items, list) for items in kinds) or sum(len(items) for items in kinds) > MAX_BULK_ITEMS:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': f'creates, updates and deletes must be lists with at most {MAX_BULK_ITEMS} items in total'}),
+                    'isBase64Encoded': False
+                }
+            
+            outcomes = apply_bulk(cur, user_id, body_data)
+            bump_reminders_version(cur, user_id)
+            timer.mark('query')
+            conn.commit()
+            list_cache.invalidate(user_id)
+            timer.mark('commit')
+            
             return {
-                'statusCode': 400,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'No fields to update'}),
+                'body': json.dumps(outcomes),
                 'isBase64Encoded': False
             }
         
-        update_fields.append('updated_at = CURRENT_TIMESTAMP')
-        update_values.extend([user_id, reminder_id])
-        
-        query = f"UPDATE reminders SET {', '.join(update_fields)} WHERE user_id = %s AND id = %s RETURNING id, title, description, date, time, frequency, is_active, updated_at"
-        
-        cur.execute(query, update_values)
-        updated_reminder = cur.fetchone()
-        
-        if not updated_reminder:
-            conn.rollback()
-            cur.close()
-            conn.close()
+        # POST - Create new reminder
+        if method == 'POST':
+            body_data = json.loads(event.get('body', '{}'))
+            ReminderCreate, _ = request_models()
+            reminder_data = ReminderCreate(**body_data)
+            timer.mark('validate')
+            
+            prepared_statements.execute(
+                cur,
+                "INSERT INTO reminders (user_id, title, description, date, time, frequency, next_fire_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s, reminder_next_fire_at(%s::date, %s::time, %s, LOCALTIMESTAMP), CURRENT_TIMESTAMP) RETURNING id, title, description, date, time, frequency, is_active, created_at",
+                (user_id, reminder_data.title, reminder_data.description, reminder_data.date, reminder_data.time, reminder_data.frequency,
+                 reminder_data.date, reminder_data.time, reminder_data.frequency)
+            )
+            new_reminder = cur.fetchone()
+            bump_reminders_version(cur, user_id)
+            timer.mark('query')
+            conn.commit()
+            list_cache.invalidate(user_id)
+            timer.mark('commit')
+            
             return {
-                'statusCode': 404,
+                'statusCode': 201,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Reminder not found'}),
+                'body': json.dumps({
+                    'id': new_reminder[0],
+                    'title': new_reminder[1],
+                    'description': new_reminder[2],
+                    'date': new_reminder[3].isoformat(),
+                    'time': new_reminder[4].strftime('%H:%M'),
+                    'frequency': new_reminder[5],
+                    'is_active': new_reminder[6],
+                    'created_at': new_reminder[7].isoformat()
+                }),
                 'isBase64Encoded': False
             }
         
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                'id': updated_reminder[0],
-                'title': updated_reminder[1],
-                'description': updated_reminder[2],
-                'date': updated_reminder[3].isoformat(),
-                'time': updated_reminder[4].strftime('%H:%M'),
-                'frequency': updated_reminder[5],
-                'is_active': updated_reminder[6],
-                'updated_at': updated_reminder[7].isoformat()
-            }),
-            'isBase64Encoded': False
-        }
-    
-    # DELETE - Delete reminder (soft delete by setting is_active = false)
-    if method == 'DELETE':
-        params = event.get('queryStringParameters') or {}
-        reminder_id = params.get('id')
-        
-        if not reminder_id:
-            cur.close()
-            conn.close()
+        # PUT - Update reminder
+        if method == 'PUT':
+            params = event.get('queryStringParameters') or {}
+            reminder_id = params.get('id')
+            
+            if not reminder_id:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Reminder id is required'}),
+                    'isBase64Encoded': False
+                }
+            
+            body_data = json.loads(event.get('body', '{}'))
+            _, ReminderUpdate = request_models()
+            update_data = ReminderUpdate(**body_data)
+            timer.mark('validate')
+            
+            # Build dynamic update query
+            update_fields = []
+            update_values = []
+            
+            if update_data.title is not None:
+                update_fields.append('title = %s')
+                update_values.append(update_data.title)
+            if update_data.description is not None:
+                update_fields.append('description = %s')
+                update_values.append(update_data.description)
+            if update_data.date is not None:
+                update_fields.append('date = %s')
+                update_values.append(update_data.date)
+            if update_data.time is not None:
+                update_fields.append('time = %s')
+                update_values.append(update_data.time)
+            if update_data.frequency is not None:
+                update_fields.append('frequency = %s')
+                update_values.append(update_data.frequency)
+            if update_data.is_active is not None:
+                update_fields.append('is_active = %s')
+                update_values.append(update_data.is_active)
+            
+            if not update_fields:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'No fields to update'}),
+                    'isBase64Encoded': False
+                }
+            
+            # Reschedule when the series changes; SET expressions see the old
+            # row, so new values are passed explicitly and fall back to it
+            if any(v is not None for v in (update_data.date, update_data.time, update_data.frequency, update_data.is_active)):
+                update_fields.append('next_fire_at = reminder_next_fire_at(COALESCE(%s::date, date), COALESCE(%s::time, time), COALESCE(%s, frequency), LOCALTIMESTAMP)')
+                update_values.extend([update_data.date, update_data.time, update_data.frequency])
+            
+            update_fields.append('updated_at = CURRENT_TIMESTAMP')
+            update_values.extend([user_id, reminder_id])
+            
+            query = f"UPDATE reminders SET {', '.join(update_fields)} WHERE user_id = %s AND id = %s RETURNING id, title, description, date, time, frequency, is_active, updated_at"
+            
+            prepared_statements.execute(cur, query, update_values)
+            updated_reminder = cur.fetchone()
+            timer.mark('query')
+            
+            if not updated_reminder:
+                conn.rollback()
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Reminder not found'}),
+                    'isBase64Encoded': False
+                }
+            
+            bump_reminders_version(cur, user_id)
+            conn.commit()
+            list_cache.invalidate(user_id)
+            timer.mark('commit')
+            
             return {
-                'statusCode': 400,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Reminder id is required'}),
+                'body': json.dumps({
+                    'id': updated_reminder[0],
+                    'title': updated_reminder[1],
+                    'description': updated_reminder[2],
+                    'date': updated_reminder[3].isoformat(),
+                    'time': updated_reminder[4].strftime('%H:%M'),
+                    'frequency': updated_reminder[5],
+                    'is_active': updated_reminder[6],
+                    'updated_at': updated_reminder[7].isoformat()
+                }),
                 'isBase64Encoded': False
             }
         
-        cur.execute(
-            "UPDATE reminders SET is_active = false WHERE user_id = %s AND id = %s RETURNING id",
-            (user_id, reminder_id)
-        )
-        deleted_reminder = cur.fetchone()
-        
-        if not deleted_reminder:
-            conn.rollback()
-            cur.close()
-            conn.close()
+        # DELETE - Delete reminder (soft delete by setting is_active = false)
+        if method == 'DELETE':
+            params = event.get('queryStringParameters') or {}
+            reminder_id = params.get('id')
+            
+            if not reminder_id:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Reminder id is required'}),
+                    'isBase64Encoded': False
+                }
+            
+            prepared_statements.execute(
+                cur,
+                "UPDATE reminders SET is_active = false, updated_at = CURRENT_TIMESTAMP WHERE user_id = %s AND id = %s RETURNING id",
+                (user_id, reminder_id)
+            )
+            deleted_reminder = cur.fetchone()
+            timer.mark('query')
+            
+            if not deleted_reminder:
+                conn.rollback()
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Reminder not found'}),
+                    'isBase64Encoded': False
+                }
+            
+            bump_reminders_version(cur, user_id)
+            conn.commit()
+            list_cache.invalidate(user_id)
+            timer.mark('commit')
+            
             return {
-                'statusCode': 404,
+                'statusCode': 200,
                 'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Reminder not found'}),
+                'body': json.dumps({'message': 'Reminder deleted successfully'}),
                 'isBase64Encoded': False
             }
         
-        conn.commit()
-        cur.close()
-        conn.close()
-        
         return {
-            'statusCode': 200,
+            'statusCode': 405,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'message': 'Reminder deleted successfully'}),
+            'body': json.dumps({'error': 'Method not allowed'}),
             'isBase64Encoded': False
         }
-    
-    cur.close()
-    conn.close()
-    return {
-        'statusCode': 405,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({'error': 'Method not allowed'}),
-        'isBase64Encoded': False
-    }
+    finally:
+        # Return the connection to the pool for the next warm invocation;
+        # any transaction left open by an early return is rolled back there
+        cur.close()
+        db_pool.putconn(conn)
@@ -1,27 +1,890 @@
 '''
-Business: Send email notification for reminders
+Business: Queue reminder emails in a durable outbox and deliver them from it
 Args: event - dict with httpMethod, body (to_email, reminder_title, reminder_date, reminder_time)
+      or body (notifications - list of such items) to enqueue a batch; an idempotency key comes from
+      the Idempotency-Key header or each item's idempotency_key; queryStringParameters action=drain
+      (batch_size, max_batches) delivers due outbox rows, needs the X-Admin-Token header and is invoked by a timer trigger
       context - object with request_id attribute
-Returns: HTTP response with success status
+Returns: HTTP 202 with the queued outbox ids, or counts of sent, retried and failed rows for a drain
 '''
+import base64
+import hashlib
+import hmac
 import json
 import os
-from typing import Dict, Any
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from pydantic import BaseModel, EmailStr, Field
+import re
+import threading
+import weakref
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from queue import LifoQueue
+from random import random
+from time import monotonic, perf_counter, sleep, time as current_timestamp
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 
-class NotificationRequest(BaseModel):
-    to_email: EmailStr
-    reminder_title: str = Field(..., min_length=1)
-    reminder_date: str
-    reminder_time: str
-    reminder_description: str = ''
+@lru_cache(maxsize=None)
+def request_model() -> Any:
+    '''
+    Build the pydantic request model on first use; pydantic and
+    email_validator make up most of the cold-start import time and
+    OPTIONS preflights never need them.
+    '''
+    from pydantic import BaseModel, EmailStr, Field
+
+    class NotificationRequest(BaseModel):
+        to_email: EmailStr
+        reminder_title: str = Field(..., min_length=1)
+        reminder_date: str
+        reminder_time: str
+        reminder_description: str = ''
+
+    return NotificationRequest
+
+
+MAX_BATCH_SIZE = 500
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+DEFAULT_DRAIN_BATCH_SIZE = int(os.environ.get('OUTBOX_DRAIN_BATCH_SIZE', '200'))
+DEFAULT_DRAIN_MAX_BATCHES = int(os.environ.get('OUTBOX_DRAIN_MAX_BATCHES', '20'))
+MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+RETRY_BASE_SECONDS = float(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', '30'))
+RETRY_MAX_SECONDS = float(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', '3600'))
+# A claimed row whose worker dies is picked up again once this lease runs out
+LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+# Keyless requests with identical content are only collapsed inside one window
+DERIVED_KEY_WINDOW_SECONDS = int(os.environ.get('OUTBOX_DERIVED_KEY_WINDOW_SECONDS', '600'))
+
+
+class PoolExhausted(Exception):
+    '''No connection became available within the checkout timeout'''
+
+
+class ConnectionPool:
+    '''
+    Module-level pool of psycopg2 connections that survives warm invocations.
+    Idle connections are health-checked on checkout and transparently replaced
+    when broken; at most max_size idle connections are kept. With
+    max_connections set, at most that many are open at once, idle or checked
+    out, and getconn waits up to checkout_timeout for one to come back before
+    raising PoolExhausted. A checked-out connection that is dropped without
+    putconn frees its slot once it is garbage collected.
+    '''
+
+    def __init__(self, dsn_env: str = 'DATABASE_URL', max_size: int = 4, ping_after: float = 30.0,
+                 max_connections: int = 0, checkout_timeout: float = 5.0):
+        self.dsn_env = dsn_env
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.timeouts = 0
+        self._connecting = 0
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    def _is_healthy(self, conn: Any, idle_since: float) -> bool:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round trip when the connection has been idle long
+        # enough for the server or a proxy to have dropped it
+        if monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        import psycopg2
+        
+        with self._lock:
+            self._in_use.discard(conn)
+            self._returned.notify()
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self) -> Any:
+        import psycopg2
+        
+        deadline = monotonic() + self.checkout_timeout
+        replaced = False
+        while True:
+            with self._lock:
+                # Idle connections count toward the limit, so one is always
+                # reused before waiting for a checked-out one to return
+                while not self._idle and self.max_connections and len(self._in_use) + self._connecting >= self.max_connections:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolExhausted(f'no database connection free within {self.checkout_timeout}s')
+                    self._returned.wait(remaining)
+                if not self._idle:
+                    self._connecting += 1
+                    break
+                conn, idle_since = self._idle.pop()
+                self._in_use.add(conn)
+            if self._is_healthy(conn, idle_since):
+                with self._lock:
+                    self.hits += 1
+                return conn
+            self._discard(conn)
+            replaced = True
+        
+        try:
+            conn = psycopg2.connect(os.environ[self.dsn_env])
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._returned.notify()
+            raise
+        with self._lock:
+            self._connecting -= 1
+            self._in_use.add(conn)
+            if replaced:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        import psycopg2
+        import psycopg2.extensions
+        
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+        
+        with self._lock:
+            if not conn.closed and len(self._idle) < self.max_size:
+                self._in_use.discard(conn)
+                self._idle.append((conn, monotonic()))
+                self._returned.notify()
+                return
+        self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'timeouts': self.timeouts,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'max_size': self.max_size,
+                'max_connections': self.max_connections
+            }
+
+
+db_pool = ConnectionPool(
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+    ping_after=float(os.environ.get('DB_POOL_PING_AFTER', '30')),
+    max_connections=int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '16')),
+    checkout_timeout=float(os.environ.get('DB_POOL_CHECKOUT_TIMEOUT', '5'))
+)
+
+
+
+def is_connection_error(error: Exception) -> bool:
+    '''
+    True when the session can no longer be trusted and must be reopened.
+    SMTPException subclasses OSError, so protocol replies such as a
+    refused recipient are excluded explicitly.
+    '''
+    import smtplib
+    
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SmtpSession:
+    '''
+    One authenticated SMTP connection, pooled at module level by
+    SmtpDelivery so warm invocations and batches skip the
+    connect/STARTTLS/AUTH handshake. A connection idle for longer than
+    ping_after is probed with NOOP before reuse; one that drops mid-batch
+    is caught by send(). Not thread-safe; one worker at a time.
+    '''
+
+    def __init__(self, ping_after: float = 30.0):
+        self.server: Optional[Any] = None
+        self.config: Optional[Tuple[str, int, str, str]] = None
+        self.ping_after = ping_after
+        self.last_used = 0.0
+
+    def _connect(self, config: Tuple[str, int, str, str]) -> Any:
+        import smtplib
+        
+        smtp_host, smtp_port, smtp_user, smtp_password = config
+        if smtp_port == 465:
+            # SSL connection
+            server = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=30)
+        else:
+            # TLS connection; plain relays such as a local test sink opt out
+            server = smtplib.SMTP(smtp_host, smtp_port, timeout=30)
+            if os.environ.get('SMTP_STARTTLS', 'true').lower() != 'false':
+                server.starttls()
+        server.login(smtp_user, smtp_password)
+        return server
+
+    def _is_alive(self) -> bool:
+        try:
+            return self.server.noop()[0] == 250
+        except OSError:
+            return False
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except OSError:
+                pass
+        self.server = None
+
+    def open(self, config: Tuple[str, int, str, str]) -> Any:
+        stale = monotonic() - self.last_used > self.ping_after
+        if self.server is not None and (self.config != config or (stale and not self._is_alive())):
+            self.close()
+        if self.server is None:
+            self.server = self._connect(config)
+            self.config = config
+        return self.server
+
+    def send(self, msg: Tuple[str, str, bytes], config: Tuple[str, int, str, str]) -> None:
+        '''Send a rendered (sender, recipient, data) message, reconnecting once if the session has dropped'''
+        sender, recipient, data = msg
+        try:
+            self.open(config).sendmail(sender, [recipient], data)
+        except OSError as e:
+            if not is_connection_error(e):
+                raise
+            self.close()
+            self.open(config).sendmail(sender, [recipient], data)
+        self.last_used = monotonic()
+
+
+class TokenBucket:
+    '''
+    Send rate limit for one SMTP host: rate messages per second with bursts
+    of up to burst. A throttling reply pauses the whole host for a back-off
+    that doubles while throttling continues and resets on the next success.
+    '''
+
+    def __init__(self, rate: float, burst: int, backoff_base: float, backoff_max: float):
+        self.rate = rate
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.paused_until = 0.0
+        self.backoff = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, now: float) -> float:
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.0)
+
+    def acquire(self, max_wait: float) -> Optional[float]:
+        '''
+        Take a token, sleeping for it if that takes at most max_wait seconds.
+        Returns None once a token is taken, otherwise the expected wait.
+        '''
+        deadline = monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = monotonic()
+                wait = self._wait_time(now)
+                if wait == 0.0:
+                    self.tokens -= 1
+                    return None
+            if now + wait > deadline:
+                return wait
+            sleep(wait)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.backoff = min(max(self.backoff * 2, self.backoff_base), self.backoff_max)
+            self.paused_until = max(self.paused_until, monotonic() + self.backoff)
+
+    def succeeded(self) -> None:
+        # Workers report concurrently with throttled(); an unlocked reset could be lost
+        with self._lock:
+            self.backoff = 0.0
+
+
+def is_throttling_error(error: Exception) -> bool:
+    '''4xx replies: the provider asks us to slow down and try again later'''
+    import smtplib
+    
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return any(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and 400 <= error.smtp_code < 500
+
+
+class SmtpDelivery:
+    '''
+    Concurrent delivery engine: up to `concurrency` workers, each holding one
+    SmtpSession from a shared pool for the duration of a send, so at most
+    that many authenticated connections are open and they stay warm between
+    messages and invocations. Every send first takes a token from its host's
+    TokenBucket; a message that cannot get one within max_wait is deferred
+    rather than holding a worker.
+    '''
+
+    def __init__(self, concurrency: int = 8, rate: float = 50.0, burst: int = 50, max_wait: float = 5.0,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sessions: LifoQueue = LifoQueue()
+        for _ in range(concurrency):
+            self._sessions.put(SmtpSession())
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='smtp')
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst, self.backoff_base, self.backoff_max)
+            return self._buckets[host]
+
+    def _send_one(self, msg: Tuple[str, str, bytes], config: Tuple[str, int, str, str], bucket: TokenBucket) -> Tuple[str, Any]:
+        wait = bucket.acquire(self.max_wait)
+        if wait is not None:
+            return 'deferred', wait
+        
+        session = self._sessions.get()
+        try:
+            session.send(msg, config)
+        except OSError as e:
+            if is_throttling_error(e):
+                bucket.throttled()
+            return 'error', e
+        finally:
+            self._sessions.put(session)
+        bucket.succeeded()
+        return 'sent', None
+
+    def send_all(self, messages: List[Tuple[str, str, bytes]], config: Tuple[str, int, str, str]) -> List[Tuple[str, Any]]:
+        '''
+        Send every message and return one (outcome, detail) per message:
+        ('sent', None), ('error', exception) or ('deferred', seconds to wait).
+        '''
+        bucket = self.bucket(config[0])
+        return list(self._executor.map(lambda msg: self._send_one(msg, config, bucket), messages))
+
+    def close(self) -> None:
+        while not self._sessions.empty():
+            self._sessions.get().close()
+
+
+smtp_delivery = SmtpDelivery(
+    concurrency=int(os.environ.get('SMTP_CONCURRENCY', '8')),
+    rate=float(os.environ.get('SMTP_RATE_PER_SECOND', '50')),
+    burst=int(os.environ.get('SMTP_RATE_BURST', '50')),
+    max_wait=float(os.environ.get('SMTP_RATE_MAX_WAIT_SECONDS', '5')),
+    backoff_base=float(os.environ.get('SMTP_THROTTLE_BACKOFF_SECONDS', '1')),
+    backoff_max=float(os.environ.get('SMTP_THROTTLE_BACKOFF_MAX_SECONDS', '60'))
+)
+
+
+def get_smtp_config() -> Optional[Tuple[str, int, str, str]]:
+    smtp_host = os.environ.get('SMTP_HOST')
+    smtp_port = int(os.environ.get('SMTP_PORT', '587'))
+    smtp_user = os.environ.get('SMTP_USER')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    
+    if not all([smtp_host, smtp_user, smtp_password]):
+        return None
+    return smtp_host, smtp_port, smtp_user, smtp_password
+
+
+TEXT_TEMPLATE = '''
+    Напоминание: ${reminder_title}
+    
+    Дата: ${reminder_date}
+    Время: ${reminder_time}
+    
+    ${reminder_description}
+    
+    ---
+    RemindMe - Ваша система напоминаний
+    '''
+
+HTML_TEMPLATE = '''
+    <html>
+      <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e2e8f0; border-radius: 8px;">
+          <h2 style="color: #0EA5E9; margin-bottom: 20px;">🔔 Напоминание</h2>
+          <h3 style="color: #1e293b; margin-bottom: 15px;">${reminder_title}</h3>
+          
+          <div style="background-color: #f1f5f9; padding: 15px; border-radius: 6px; margin-bottom: 15px;">
+            <p style="margin: 5px 0;"><strong>📅 Дата:</strong> ${reminder_date}</p>
+            <p style="margin: 5px 0;"><strong>⏰ Время:</strong> ${reminder_time}</p>
+          </div>
+          
+          ${description_block}
+          
+          <hr style="border: none; border-top: 1px solid #e2e8f0; margin: 20px 0;">
+          <p style="color: #94a3b8; font-size: 12px; text-align: center;">RemindMe - Ваша система напоминаний</p>
+        </div>
+      </body>
+    </html>
+    '''
+
+HTML_DESCRIPTION_TEMPLATE = '<p style="color: #475569; margin-top: 15px;">${reminder_description}</p>'
+
+TEMPLATE_FIELD_RE = re.compile(r'\$\{(\w+)\}')
+
+# '=?utf-8?b?' + 60 base64 characters + '?=' is the longest encoded word RFC 2047 allows
+ENCODED_WORD_BYTES = 45
+
+# Bodies are base64, whose alphabet has no '-' or '_', so a fixed boundary can never collide
+MIME_BOUNDARY = '=_remindme_alternative'
+
+
+class CompiledTemplate:
+    '''
+    A template with ${field} placeholders, split once into UTF-8 encoded
+    literal chunks and field names so rendering is a single bytes join.
+    escape is applied to every field except those listed in raw, which
+    carry already rendered markup.
+    '''
+
+    def __init__(self, source: str, escape: Optional[Callable[[str], str]] = None, raw: Tuple[str, ...] = ()):
+        parts = TEMPLATE_FIELD_RE.split(source)
+        self.literals = [part.encode('utf-8') for part in parts[0::2]]
+        self.fields = parts[1::2]
+        self.escape = escape
+        self.raw = raw
+
+    def render(self, values: Dict[str, str]) -> bytes:
+        chunks = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            value = values[field]
+            if self.escape is not None and field not in self.raw:
+                value = self.escape(value)
+            chunks.append(value.encode('utf-8'))
+            chunks.append(literal)
+        return b''.join(chunks)
+
+
+def encode_header(value: str) -> bytes:
+    '''
+    RFC 2047 encode non-ASCII values as folded base64 encoded words; line
+    breaks are dropped so fields cannot inject headers. A word of at most
+    75 characters carries ENCODED_WORD_BYTES bytes, split between characters.
+    '''
+    import base64
+    
+    value = value.replace('\r', ' ').replace('\n', ' ')
+    if value.isascii():
+        return value.encode('ascii')
+    
+    words = []
+    word = b''
+    for char in value:
+        encoded = char.encode('utf-8')
+        if len(word) + len(encoded) > ENCODED_WORD_BYTES:
+            words.append(word)
+            word = b''
+        word += encoded
+    words.append(word)
+    return b'\r\n '.join(b'=?utf-8?b?' + base64.b64encode(word) + b'?=' for word in words)
+
+
+def encode_address(value: str) -> bytes:
+    '''Like encode_header, but only the display name of "Name <addr>" is encoded'''
+    value = value.replace('\r', ' ').replace('\n', ' ')
+    if value.isascii() and not any(c in value for c in '<>"(),'):
+        return value.encode('ascii')
+    from email.utils import formataddr, parseaddr
+    
+    return formataddr(parseaddr(value), 'utf-8').encode('ascii')
+
+
+def encode_body(body: bytes) -> bytes:
+    import base64
+    
+    return base64.encodebytes(body).replace(b'\n', b'\r\n')
+
+
+class NotificationTemplate:
+    '''
+    The reminder email, compiled once per instance. Everything that does not
+    depend on the notification - the MIME headers, boundaries and part
+    headers - is encoded to bytes up front; a render only fills in the
+    fields, base64-encodes the two bodies and joins byte strings. Messages
+    come out as (sender, recipient, raw bytes) ready for SMTP sendmail.
+    '''
+
+    def __init__(self):
+        import html
+        
+        self.subject = CompiledTemplate('Напоминание: ${reminder_title}')
+        self.text = CompiledTemplate(TEXT_TEMPLATE)
+        self.html = CompiledTemplate(HTML_TEMPLATE, escape=html.escape, raw=('description_block',))
+        self.html_description = CompiledTemplate(HTML_DESCRIPTION_TEMPLATE, escape=html.escape)
+        self.mime_head = (
+            'MIME-Version: 1.0\r\n'
+            f'Content-Type: multipart/alternative; boundary="{MIME_BOUNDARY}"\r\n'
+            '\r\n'
+        ).encode('ascii')
+        self.part_heads = [
+            (
+                f'--{MIME_BOUNDARY}\r\n'
+                f'Content-Type: text/{subtype}; charset="utf-8"\r\n'
+                'MIME-Version: 1.0\r\n'
+                'Content-Transfer-Encoding: base64\r\n'
+                '\r\n'
+            ).encode('ascii')
+            for subtype in ('plain', 'html')
+        ]
+        self.mime_tail = f'--{MIME_BOUNDARY}--\r\n'.encode('ascii')
+
+    def render(self, notification_req: Any, smtp_from: str, from_header: Optional[bytes] = None) -> Tuple[str, str, bytes]:
+        values = {
+            'reminder_title': notification_req.reminder_title,
+            'reminder_date': notification_req.reminder_date,
+            'reminder_time': notification_req.reminder_time,
+            'reminder_description': notification_req.reminder_description
+        }
+        values['description_block'] = self.html_description.render(values).decode('utf-8') if values['reminder_description'] else ''
+        
+        data = b''.join([
+            b'Subject: ', encode_header(self.subject.render(values).decode('utf-8')), b'\r\n',
+            b'From: ', from_header or encode_address(smtp_from), b'\r\n',
+            b'To: ', encode_address(notification_req.to_email), b'\r\n',
+            self.mime_head,
+            self.part_heads[0], encode_body(self.text.render(values)),
+            self.part_heads[1], encode_body(self.html.render(values)),
+            self.mime_tail
+        ])
+        return smtp_from, notification_req.to_email, data
+
+    def render_batch(self, notifications: List[Any], smtp_from: str) -> List[Tuple[str, str, bytes]]:
+        # The sender is the same for the whole batch, so its header is encoded once
+        from_header = encode_address(smtp_from)
+        return [self.render(notification_req, smtp_from, from_header) for notification_req in notifications]
+
+
+@lru_cache(maxsize=None)
+def notification_template() -> NotificationTemplate:
+    return NotificationTemplate()
+
+
+def idempotency_key(raw_key: Any, notification_req: Any) -> Optional[str]:
+    '''
+    The caller's key, or a digest of the notification and the current
+    DERIVED_KEY_WINDOW_SECONDS window, so that a blind retry of the same
+    request is still collapsed into one email while the same content sent
+    again later is a new notification. A retry that straddles a window
+    boundary is not collapsed; callers that need exactly-once send a key.
+    None when the caller's key is unusable.
+    '''
+    if raw_key is not None:
+        if not isinstance(raw_key, str) or not 0 < len(raw_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return None
+        return raw_key
+    canonical = json.dumps(notification_req.model_dump(), sort_keys=True, ensure_ascii=False)
+    window = int(current_timestamp() // max(DERIVED_KEY_WINDOW_SECONDS, 1))
+    return f'sha256:{window}:' + hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def enqueue(cur: Any, entries: List[Tuple[str, Any]]) -> Dict[str, int]:
+    '''
+    Insert (idempotency_key, notification) pairs into the outbox in one
+    statement. Keys that already exist are left untouched, so a retried
+    enqueue never produces a second email. Returns the outbox id per key.
+    '''
+    from psycopg2.extras import execute_values
+    
+    rows = execute_values(
+        cur,
+        "INSERT INTO notification_outbox (idempotency_key, payload) VALUES %s ON CONFLICT (idempotency_key) DO NOTHING RETURNING idempotency_key, id",
+        [(key, json.dumps(notification_req.model_dump(), ensure_ascii=False)) for key, notification_req in entries],
+        fetch=True
+    )
+    return dict(rows)
+
+
+def lookup_existing(cur: Any, keys: List[str]) -> Dict[str, int]:
+    cur.execute("SELECT idempotency_key, id FROM notification_outbox WHERE idempotency_key = ANY(%s)", (keys,))
+    return dict(cur.fetchall())
+
+
+def is_permanent_error(error: Exception) -> bool:
+    '''5xx replies (unknown mailbox, rejected content) will not succeed on retry'''
+    import smtplib
+    
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def retry_delay(attempts: int) -> float:
+    '''Exponential backoff with jitter, capped at RETRY_MAX_SECONDS'''
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS) * (0.5 + random() / 2)
+
+
+def drain_batch(conn: Any, batch_size: int, config: Tuple[str, int, str, str], smtp_from: str) -> Dict[str, int]:
+    '''
+    Claim up to batch_size due rows, deliver them concurrently through
+    smtp_delivery and record the outcome. The claim is committed before any
+    email goes out so no row lock is held across SMTP round trips; SKIP
+    LOCKED lets concurrent drains take disjoint batches. Rows deferred by
+    the rate limit get their attempt back.
+    '''
+    from psycopg2.extras import execute_values
+    from pydantic import ValidationError
+    
+    NotificationRequest = request_model()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """UPDATE notification_outbox SET status = 'sending', attempts = attempts + 1,
+                next_attempt_at = LOCALTIMESTAMP + make_interval(secs => %s)
+            WHERE id IN (
+                SELECT id FROM notification_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= LOCALTIMESTAMP
+                ORDER BY next_attempt_at LIMIT %s FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, payload, attempts""",
+            (LEASE_SECONDS, batch_size)
+        )
+        claimed = cur.fetchall()
+        conn.commit()
+        
+        sent_ids: List[int] = []
+        # (id, status, last_error, delay, attempts refunded)
+        unsent: List[Tuple[int, str, str, float, int]] = []
+        deliverable: List[Tuple[int, int]] = []
+        notifications: List[Any] = []
+        for outbox_id, payload, attempts in claimed:
+            try:
+                notifications.append(NotificationRequest.model_validate(payload))
+                deliverable.append((outbox_id, attempts))
+            except ValidationError as e:
+                unsent.append((outbox_id, 'failed', str(e), 0.0, 0))
+        messages = notification_template().render_batch(notifications, smtp_from)
+        
+        for (outbox_id, attempts), (outcome, detail) in zip(deliverable, smtp_delivery.send_all(messages, config)):
+            if outcome == 'sent':
+                sent_ids.append(outbox_id)
+            elif outcome == 'deferred':
+                unsent.append((outbox_id, 'pending', 'Deferred by the send rate limit', detail, 1))
+            else:
+                give_up = is_permanent_error(detail) or attempts >= MAX_ATTEMPTS
+                unsent.append((outbox_id, 'failed' if give_up else 'pending', str(detail), retry_delay(attempts), 0))
+        
+        if sent_ids:
+            cur.execute(
+                "UPDATE notification_outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL WHERE id = ANY(%s)",
+                (sent_ids,)
+            )
+        if unsent:
+            execute_values(
+                cur,
+                """UPDATE notification_outbox o SET
+                    status = data.status,
+                    last_error = data.error,
+                    attempts = o.attempts - data.refund,
+                    next_attempt_at = LOCALTIMESTAMP + make_interval(secs => data.delay)
+                FROM (VALUES %s) AS data (id, status, error, delay, refund)
+                WHERE o.id = data.id""",
+                unsent
+            )
+        conn.commit()
+        
+        failed = sum(1 for row in unsent if row[1] == 'failed')
+        deferred = sum(row[4] for row in unsent)
+        return {
+            'claimed': len(claimed),
+            'sent': len(sent_ids),
+            'retried': len(unsent) - failed - deferred,
+            'failed': failed,
+            'deferred': deferred
+        }
+    finally:
+        cur.close()
+
+
+# Response compression: bodies of at least COMPRESS_MIN_BYTES are encoded with
+# the best coding the client accepts; levels trade CPU for bytes on the wire
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+
+@lru_cache(maxsize=None)
+def brotli_module() -> Any:
+    '''The brotli package if it is installed; without it only gzip is offered'''
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate_encoding(headers: Dict[str, Any], supported: Tuple[str, ...] = ('br', 'gzip')) -> Optional[str]:
+    '''Preferred content coding from Accept-Encoding among supported, in order of preference on q ties'''
+    accept = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    weights: Dict[str, float] = {}
+    for item in accept.split(','):
+        coding, _, quality = item.strip().partition(';')
+        try:
+            weights[coding.strip().lower()] = float(quality.strip().removeprefix('q=') or '1')
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for coding in supported:
+        if coding == 'br' and brotli_module() is None:
+            continue
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress_response(response: Dict[str, Any], headers: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Encode a large text body with gzip or brotli in place, returned base64 as
+    the gateway requires. Bodies that are already binary or encoded, small,
+    or would not shrink are left alone.
+    '''
+    body = response.get('body')
+    response_headers = response.setdefault('headers', {})
+    if response.get('isBase64Encoded') or 'Content-Encoding' in response_headers or not isinstance(body, str) or len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    vary = response_headers.get('Vary')
+    if not vary:
+        response_headers['Vary'] = 'Accept-Encoding'
+    elif 'Accept-Encoding' not in vary:
+        response_headers['Vary'] = f'{vary}, Accept-Encoding'
+    encoding = negotiate_encoding(headers)
+    if encoding is None:
+        return response
+
+    raw = body.encode('utf-8')
+    if encoding == 'br':
+        compressed = brotli_module().compress(raw, quality=BROTLI_QUALITY)
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compressed = compressor.compress(raw) + compressor.flush()
+    if len(compressed) >= len(raw):
+        return response
+
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    response_headers['Content-Encoding'] = encoding
+    return response
+
+
+TIMING_LOG_SAMPLE_RATE = float(os.environ.get('TIMING_LOG_SAMPLE_RATE', '0.01'))
+
+
+class PhaseTimer:
+    '''
+    Wall-clock time spent in each phase of one invocation. Phases are charged
+    by mark(), which bills everything since the previous mark, so the hot path
+    pays one perf_counter() call per phase. finish() reports the phases in a
+    Server-Timing header and, for a sampled share of requests, as a one-line
+    JSON log keyed by the platform request id, together with the process's
+    pool and cache counters when a counters callable is given.
+    '''
+    
+    def __init__(self, function_name: str, counters: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+        self.function_name = function_name
+        self.counters = counters
+        self.started = self.last = perf_counter()
+        self.phases: Dict[str, float] = {}
+    
+    def mark(self, phase: str) -> None:
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+    
+    def finish(self, response: Optional[Dict[str, Any]], context: Any, method: str) -> None:
+        total_ms = (perf_counter() - self.started) * 1000
+        
+        if response is not None:
+            metrics = [f'{phase};dur={ms:.2f}' for phase, ms in self.phases.items()]
+            metrics.append(f'total;dur={total_ms:.2f}')
+            headers = response.setdefault('headers', {})
+            headers['Server-Timing'] = ', '.join(metrics)
+            headers['Timing-Allow-Origin'] = '*'
+            exposed = headers.get('Access-Control-Expose-Headers')
+            headers['Access-Control-Expose-Headers'] = f'{exposed}, Server-Timing' if exposed else 'Server-Timing'
+        
+        if random() < TIMING_LOG_SAMPLE_RATE:
+            record = {
+                'request_id': getattr(context, 'request_id', None),
+                'function': self.function_name,
+                'method': method,
+                # No response means the handler raised
+                'status': response.get('statusCode') if response is not None else 500,
+                'total_ms': round(total_ms, 2),
+                'phases_ms': {phase: round(ms, 2) for phase, ms in self.phases.items()}
+            }
+            if self.counters is not None:
+                # Cumulative since the process started, so rates come from differences between samples
+                record['counters'] = self.counters()
+            print(json.dumps(record))
+
+
+def runtime_counters() -> Dict[str, Any]:
+    return {'db_pool': db_pool.stats()}
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    timer = PhaseTimer('send-notification', runtime_counters)
+    response = None
+    try:
+        response = compress_response(handle_request(event, context, timer), event.get('headers') or {})
+        timer.mark('compress')
+        return response
+    finally:
+        timer.finish(response, context, event.get('httpMethod', 'POST'))
+
+
+def admin_authorized(headers: Dict[str, Any]) -> bool:
+    '''Timer triggers and operators pass ADMIN_TOKEN in X-Admin-Token; while it is unset nobody is let in'''
+    expected = os.environ.get('ADMIN_TOKEN')
+    supplied = headers.get('X-Admin-Token') or headers.get('x-admin-token')
+    if not expected or not isinstance(supplied, str):
+        return False
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def handle_request(event: Dict[str, Any], context: Any, timer: PhaseTimer) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'POST')
     
     # Handle CORS OPTIONS request
@@ -31,7 +894,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
+                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, Idempotency-Key, X-Admin-Token',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
@@ -46,88 +909,165 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'isBase64Encoded': False
         }
     
-    # Parse and validate request
-    body_data = json.loads(event.get('body', '{}'))
-    notification_req = NotificationRequest(**body_data)
+    params = event.get('queryStringParameters') or {}
     
-    # Get SMTP configuration from environment
-    smtp_host = os.environ.get('SMTP_HOST')
-    smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-    smtp_user = os.environ.get('SMTP_USER')
-    smtp_password = os.environ.get('SMTP_PASSWORD')
-    smtp_from = os.environ.get('SMTP_FROM_EMAIL', smtp_user)
-    
-    if not all([smtp_host, smtp_user, smtp_password]):
+    # ?action=drain - Deliver due outbox rows; invoked by a timer trigger
+    if params.get('action') == 'drain':
+        # Draining sends real mail and spends the per-host send budgets
+        if not admin_authorized(event.get('headers') or {}):
+            return {
+                'statusCode': 403,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'Admin token required'}),
+                'isBase64Encoded': False
+            }
+        
+        try:
+            batch_size = min(max(int(params.get('batch_size') or DEFAULT_DRAIN_BATCH_SIZE), 1), MAX_BATCH_SIZE)
+            max_batches = min(max(int(params.get('max_batches') or DEFAULT_DRAIN_MAX_BATCHES), 1), 100)
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'batch_size and max_batches must be integers'}),
+                'isBase64Encoded': False
+            }
+        
+        config = get_smtp_config()
+        
+        if config is None:
+            return {
+                'statusCode': 500,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': 'SMTP configuration is incomplete'}),
+                'isBase64Encoded': False
+            }
+        
+        smtp_from = os.environ.get('SMTP_FROM_EMAIL', config[2])
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0, 'batches': 0}
+        
+        conn = db_pool.getconn()
+        try:
+            # Keep claiming until nothing is due or the tick budget is spent
+            while totals['batches'] < max_batches:
+                outcome = drain_batch(conn, batch_size, config, smtp_from)
+                totals['batches'] += 1
+                for name, count in outcome.items():
+                    totals[name] += count
+                # A deferral means the host's rate limit is the bottleneck now
+                if outcome['claimed'] < batch_size or outcome['deferred']:
+                    break
+        finally:
+            db_pool.putconn(conn)
+        timer.mark('drain')
+        
         return {
-            'statusCode': 500,
+            'statusCode': 200,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'SMTP configuration is incomplete'}),
+            'body': json.dumps(totals),
             'isBase64Encoded': False
         }
     
-    # Create email message
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = f'Напоминание: {notification_req.reminder_title}'
-    msg['From'] = smtp_from
-    msg['To'] = notification_req.to_email
-    
-    # Email body
-    text = f'''
-    Напоминание: {notification_req.reminder_title}
-    
-    Дата: {notification_req.reminder_date}
-    Время: {notification_req.reminder_time}
-    
-    {notification_req.reminder_description}
+    headers = event.get('headers') or {}
+    body_data = json.loads(event.get('body', '{}'))
     
-    ---
-    RemindMe - Ваша система напоминаний
-    '''
+    # Batch mode - enqueue every valid notification in one statement
+    if 'notifications' in body_data:
+        from pydantic import ValidationError
+        
+        items = body_data['notifications']
+        
+        if not isinstance(items, list) or len(items) > MAX_BATCH_SIZE:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': f'notifications must be a list of at most {MAX_BATCH_SIZE} items'}),
+                'isBase64Encoded': False
+            }
+        
+        NotificationRequest = request_model()
+        results: List[Dict[str, Any]] = []
+        entries: List[Tuple[str, Any]] = []
+        for index, item in enumerate(items):
+            try:
+                notification_req = NotificationRequest.model_validate(item)
+            except ValidationError as e:
+                results.append({'index': index, 'status': 'invalid', 'error': e.errors()[0]['msg']})
+                continue
+            key = idempotency_key(item.get('idempotency_key'), notification_req)
+            if key is None:
+                results.append({'index': index, 'status': 'invalid', 'error': 'Invalid idempotency_key'})
+                continue
+            results.append({'index': index, 'status': 'queued', 'key': key})
+            entries.append((key, notification_req))
+        timer.mark('validate')
+        
+        conn = db_pool.getconn()
+        cur = conn.cursor()
+        try:
+            inserted = enqueue(cur, entries) if entries else {}
+            existing = lookup_existing(cur, [key for key, _ in entries if key not in inserted]) if len(inserted) < len(entries) else {}
+            conn.commit()
+        finally:
+            cur.close()
+            db_pool.putconn(conn)
+        timer.mark('enqueue')
+        
+        # Only the first item carrying a newly inserted key counts as queued
+        claimed_keys = set()
+        for result in results:
+            key = result.pop('key', None)
+            if key is None:
+                continue
+            result['id'] = inserted.get(key) or existing.get(key)
+            if key not in inserted or key in claimed_keys:
+                result['status'] = 'duplicate'
+            claimed_keys.add(key)
+        
+        return {
+            'statusCode': 202,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({
+                'queued': sum(1 for r in results if r['status'] == 'queued'),
+                'duplicates': sum(1 for r in results if r['status'] == 'duplicate'),
+                'invalid': sum(1 for r in results if r['status'] == 'invalid'),
+                'results': results
+            }),
+            'isBase64Encoded': False
+        }
     
-    html = f'''
-    <html>
-      <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e2e8f0; border-radius: 8px;">
-          <h2 style="color: #0EA5E9; margin-bottom: 20px;">🔔 Напоминание</h2>
-          <h3 style="color: #1e293b; margin-bottom: 15px;">{notification_req.reminder_title}</h3>
-          
-          <div style="background-color: #f1f5f9; padding: 15px; border-radius: 6px; margin-bottom: 15px;">
-            <p style="margin: 5px 0;"><strong>📅 Дата:</strong> {notification_req.reminder_date}</p>
-            <p style="margin: 5px 0;"><strong>⏰ Время:</strong> {notification_req.reminder_time}</p>
-          </div>
-          
-          {f'<p style="color: #475569; margin-top: 15px;">{notification_req.reminder_description}</p>' if notification_req.reminder_description else ''}
-          
-          <hr style="border: none; border-top: 1px solid #e2e8f0; margin: 20px 0;">
-          <p style="color: #94a3b8; font-size: 12px; text-align: center;">RemindMe - Ваша система напоминаний</p>
-        </div>
-      </body>
-    </html>
-    '''
+    # Parse and validate request
+    notification_req = request_model()(**body_data)
+    key = idempotency_key(headers.get('Idempotency-Key') or headers.get('idempotency-key') or body_data.get('idempotency_key'), notification_req)
+    timer.mark('validate')
     
-    part1 = MIMEText(text, 'plain', 'utf-8')
-    part2 = MIMEText(html, 'html', 'utf-8')
-    msg.attach(part1)
-    msg.attach(part2)
+    if key is None:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Idempotency key must be a string of at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters'}),
+            'isBase64Encoded': False
+        }
     
-    # Send email
-    if smtp_port == 465:
-        # SSL connection
-        server = smtplib.SMTP_SSL(smtp_host, smtp_port)
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
-    else:
-        # TLS connection
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
+    # Enqueue and return; the drain worker owns delivery and retries
+    conn = db_pool.getconn()
+    cur = conn.cursor()
+    try:
+        inserted = enqueue(cur, [(key, notification_req)])
+        outbox_id = inserted.get(key) or lookup_existing(cur, [key]).get(key)
+        conn.commit()
+    finally:
+        cur.close()
+        db_pool.putconn(conn)
+    timer.mark('enqueue')
     
     return {
-        'statusCode': 200,
+        'statusCode': 202,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({'message': 'Notification sent successfully'}),
+        'body': json.dumps({
+            'id': outbox_id,
+            'status': 'queued' if key in inserted else 'duplicate',
+            'message': 'Notification queued'
+        }),
         'isBase64Encoded': False
     }
@@ -0,0 +1,302 @@
+'''
+Self-hosted server for the backend functions, as an alternative to deploying
+them as separate cloud functions.
+
+Every function directory with an index.py is mounted at /<name> and, so the
+frontend only has to swap the host, at the path of its URL in func2url.json:
+
+    https://functions.poehali.dev/74878efb-...?id=5  ->  http://localhost:8000/74878efb-...?id=5
+                                                    or  http://localhost:8000/reminders?id=5
+
+HTTP requests are translated into the gateway event the handlers expect and
+their response dicts back into HTTP responses. Within a worker process all
+functions share one database connection pool; the SMTP session pool and the
+JWT verification cache are module-level and therefore shared as well. Workers
+are forked processes serving one listening socket, each answering requests
+from a bounded thread pool:
+
+    DATABASE_URL=postgresql://localhost/reminders python backend/server.py --port 8000 --workers 4 --threads 16
+
+With --tick-seconds the first worker also runs the reminder dispatcher, the
+notification outbox drain and the reminder archiver on that interval,
+standing in for the timer triggers of the cloud deployment.
+
+Those jobs and reminder-stats-check are admin routes: they answer only
+requests carrying an X-Admin-Token header equal to ADMIN_TOKEN, and are
+refused altogether while that variable is unset. The handlers enforce this
+themselves; the server refuses such requests before dispatching them too.
+'''
+import argparse
+import base64
+import hmac
+import importlib.util
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from socketserver import BaseServer
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HEADER_NAMES = {'CONTENT_TYPE': 'Content-Type', 'CONTENT_LENGTH': 'Content-Length'}
+# Timer-triggered jobs and maintenance commands; send-notification is only an
+# admin route for ?action=drain
+ADMIN_FUNCTIONS = {'reminder-dispatcher', 'reminder-archiver', 'reminder-stats-check'}
+
+
+class Context:
+    def __init__(self, function_name: str):
+        self.request_id = str(uuid.uuid4())
+        self.function_name = function_name
+
+
+def discover_functions() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, 'index.py'))
+    )
+
+
+def load_function(name: str) -> Any:
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_') + '_index', os.path.join(BACKEND_DIR, name, 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_functions(pool_size: int) -> Dict[str, Any]:
+    '''
+    Import every function and point them all at one connection pool. The
+    handlers look db_pool up as a module global on each call, so replacing
+    it is enough. The pool opens at most one connection per request thread
+    plus one for the tick thread.
+    '''
+    modules = {name: load_function(name) for name in discover_functions()}
+    pooled = [module for module in modules.values() if hasattr(module, 'db_pool')]
+    if pooled:
+        template = pooled[0].db_pool
+        shared_pool = pooled[0].ConnectionPool(
+            max_size=pool_size,
+            ping_after=template.ping_after,
+            max_connections=pool_size + 1,
+            checkout_timeout=template.checkout_timeout
+        )
+        for module in pooled:
+            module.db_pool = shared_pool
+    return modules
+
+
+def build_routes(modules: Dict[str, Any]) -> Dict[str, Tuple[str, Any]]:
+    routes = {name: (name, module) for name, module in modules.items()}
+    try:
+        with open(os.path.join(BACKEND_DIR, 'func2url.json')) as f:
+            func2url = json.load(f)
+    except (OSError, ValueError):
+        func2url = {}
+    for name, url in func2url.items():
+        if name in modules:
+            routes[urlsplit(url).path.strip('/')] = (name, modules[name])
+    return routes
+
+
+def to_event(environ: Dict[str, Any], path: str) -> Dict[str, Any]:
+    headers = {}
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            headers['-'.join(part.capitalize() for part in key[5:].split('_'))] = value
+        elif key in DEFAULT_HEADER_NAMES and value:
+            headers[DEFAULT_HEADER_NAMES[key]] = value
+
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    body = environ['wsgi.input'].read(length).decode('utf-8') if length else ''
+    query = parse_qs(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+
+    return {
+        'httpMethod': environ['REQUEST_METHOD'],
+        'headers': headers,
+        'queryStringParameters': {key: values[0] for key, values in query.items()},
+        'path': path or '/',
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+
+def error_response(status: int, message: str) -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'error': message}),
+        'isBase64Encoded': False
+    }
+
+
+def is_admin_request(name: str, event: Dict[str, Any]) -> bool:
+    return name in ADMIN_FUNCTIONS or (name == 'send-notification' and event['queryStringParameters'].get('action') == 'drain')
+
+
+def admin_authorized(event: Dict[str, Any]) -> bool:
+    expected = os.environ.get('ADMIN_TOKEN')
+    supplied = event['headers'].get('X-Admin-Token')
+    return bool(expected) and supplied is not None and hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+
+def invoke(name: str, module: Any, event: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return module.handler(event, Context(name))
+    except Exception as e:
+        # Request validation errors surface as exceptions from the handlers
+        if type(e).__name__ == 'ValidationError':
+            return error_response(422, str(e))
+        if isinstance(e, json.JSONDecodeError):
+            return error_response(400, 'Request body must be JSON')
+        if type(e).__name__ == 'PoolExhausted':
+            response = error_response(503, 'Database busy, please try again later')
+            response['headers']['Retry-After'] = '1'
+            return response
+        print(json.dumps({'function': name, 'error': repr(e)}), file=sys.stderr)
+        return error_response(500, 'Internal server error')
+
+
+def make_app(routes: Dict[str, Tuple[str, Any]]) -> Callable:
+    def app(environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        prefix, _, rest = environ.get('PATH_INFO', '/').lstrip('/').partition('/')
+        if prefix not in routes:
+            response = error_response(404, 'Unknown function')
+        else:
+            name, module = routes[prefix]
+            event = to_event(environ, '/' + rest)
+            if is_admin_request(name, event) and not admin_authorized(event):
+                response = error_response(403, 'Admin token required')
+            else:
+                response = invoke(name, module, event)
+
+        body = response.get('body') or ''
+        if response.get('isBase64Encoded'):
+            payload = base64.b64decode(body)
+        else:
+            payload = body.encode('utf-8') if isinstance(body, str) else body
+
+        status = HTTPStatus(response.get('statusCode', 200))
+        headers = [(key, str(value)) for key, value in (response.get('headers') or {}).items()]
+        headers.append(('Content-Length', str(len(payload))))
+        start_response(f'{status.value} {status.phrase}', headers)
+        return [payload]
+
+    return app
+
+
+class PooledWSGIServer(WSGIServer):
+    '''WSGIServer that answers requests on a bounded thread pool'''
+
+    def __init__(self, sock: socket.socket, threads: int):
+        BaseServer.__init__(self, sock.getsockname(), WSGIRequestHandler)
+        self.socket = sock
+        self.server_name = socket.getfqdn(sock.getsockname()[0])
+        self.server_port = sock.getsockname()[1]
+        self.setup_environ()
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def run_ticks(modules: Dict[str, Any], interval: float, stop: threading.Event) -> None:
+    ticks = [
+        ('reminder-dispatcher', {'httpMethod': 'POST'}),
+        ('send-notification', {'httpMethod': 'POST', 'queryStringParameters': {'action': 'drain'}}),
+        ('reminder-archiver', {'httpMethod': 'POST'})
+    ]
+    while not stop.wait(interval):
+        for name, event in ticks:
+            if name in modules:
+                invoke(name, modules[name], dict(event))
+
+
+def serve(sock: socket.socket, threads: int, tick_seconds: float, quiet: bool) -> None:
+    modules = load_functions(pool_size=threads)
+    server = PooledWSGIServer(sock, threads)
+    if quiet:
+        server.RequestHandlerClass = QuietRequestHandler
+    server.set_app(make_app(build_routes(modules)))
+
+    stop = threading.Event()
+    if tick_seconds > 0:
+        threading.Thread(target=run_ticks, args=(modules, tick_seconds, stop), daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.executor.shutdown(wait=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='forked worker processes')
+    parser.add_argument('--threads', type=int, default=16, help='request threads and pooled DB connections per worker')
+    parser.add_argument('--tick-seconds', type=float, default=0.0, help='run the dispatcher, outbox drain and archiver on this interval')
+    parser.add_argument('--quiet', action='store_true', help='do not log every request')
+    args = parser.parse_args()
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    print(f'Serving {", ".join(discover_functions())} on http://{args.host}:{args.port} with {args.workers} worker(s)', file=sys.stderr)
+
+    workers = args.workers if hasattr(os, 'fork') else 1
+    if workers == 1:
+        serve(sock, args.threads, args.tick_seconds, args.quiet)
+        return 0
+
+    # Modules are imported after the fork so no worker inherits another's connections
+    children: List[int] = []
+    for index in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            serve(sock, args.threads, args.tick_seconds if index == 0 else 0.0, args.quiet)
+            os._exit(0)
+        children.append(pid)
+
+    def stop_children(*_: Any) -> None:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop_children()
+        for pid in children:
+            os.waitpid(pid, 0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+-- Composite index backing keyset pagination of the reminders list
+CREATE INDEX IF NOT EXISTS idx_reminders_user_date_time_id ON reminders(user_id, date, time, id);
@@ -0,0 +1,10 @@
+-- Full-text search over reminder titles and descriptions.
+-- The 'simple' configuration keeps words unstemmed so prefix matching
+-- works the same for Russian and English input.
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_reminders_search_vector ON reminders USING GIN (search_vector);
@@ -0,0 +1,57 @@
+-- Materialized next fire time so the dispatcher only touches due rows
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS next_fire_at TIMESTAMP;
+
+-- First occurrence of a reminder series strictly after after_ts.
+-- Occurrences are always computed as seed + k * step rather than by
+-- stepping from the previous fire, so a series anchored on the 31st or
+-- on Feb 29 clamps to the month end only where needed and returns to its
+-- anchor day afterwards.
+CREATE OR REPLACE FUNCTION reminder_next_fire_at(seed_date DATE, seed_time TIME, frequency VARCHAR, after_ts TIMESTAMP)
+RETURNS TIMESTAMP AS $$
+DECLARE
+    seed TIMESTAMP := seed_date + seed_time;
+    step INTERVAL;
+    k INTEGER;
+    candidate TIMESTAMP;
+BEGIN
+    IF seed > after_ts THEN
+        RETURN seed;
+    END IF;
+    IF frequency = 'once' THEN
+        RETURN NULL;
+    END IF;
+
+    step := CASE frequency
+        WHEN 'daily' THEN INTERVAL '1 day'
+        WHEN 'weekly' THEN INTERVAL '7 days'
+        WHEN 'monthly' THEN INTERVAL '1 month'
+        WHEN 'yearly' THEN INTERVAL '1 year'
+    END;
+
+    -- Jump close to after_ts in one step, then walk forward at most a couple of steps
+    IF frequency IN ('daily', 'weekly') THEN
+        k := floor(extract(epoch FROM after_ts - seed) / extract(epoch FROM step));
+    ELSIF frequency = 'monthly' THEN
+        k := (extract(year FROM after_ts) - extract(year FROM seed)) * 12
+            + extract(month FROM after_ts) - extract(month FROM seed) - 1;
+    ELSE
+        k := extract(year FROM after_ts) - extract(year FROM seed) - 1;
+    END IF;
+    k := greatest(k, 0);
+
+    candidate := seed + step * k;
+    WHILE candidate <= after_ts LOOP
+        k := k + 1;
+        candidate := seed + step * k;
+    END LOOP;
+    RETURN candidate;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+UPDATE reminders
+SET next_fire_at = reminder_next_fire_at(date, time, frequency, LOCALTIMESTAMP)
+WHERE is_active = true;
+
+-- Partial index: only live rows with a pending occurrence are ever scanned
+CREATE INDEX IF NOT EXISTS idx_reminders_next_fire_at ON reminders(next_fire_at)
+    WHERE is_active = true AND next_fire_at IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Per-user version of the reminders list, bumped on every write.
+-- Used as the ETag of list responses so unchanged lists are answered with 304.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS reminders_version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,2 @@
+-- Backs delta sync: changes of one user are read in (updated_at, id) order
+CREATE INDEX IF NOT EXISTS idx_reminders_user_updated_at ON reminders(user_id, updated_at, id);
@@ -0,0 +1,40 @@
+-- All occurrences of a reminder series inside [from_ts, to_ts].
+-- The step indexes covering the window are computed arithmetically and
+-- expanded with generate_series, so the cost is proportional to the
+-- occurrences in the window, not to the distance from the seed. As in
+-- reminder_next_fire_at, each occurrence is seed + k * step, which clamps
+-- the 31st and Feb 29 to the month end only where the month is shorter.
+CREATE OR REPLACE FUNCTION reminder_occurrences(seed_date DATE, seed_time TIME, frequency VARCHAR, from_ts TIMESTAMP, to_ts TIMESTAMP)
+RETURNS TABLE(occurs_at TIMESTAMP) AS $$
+    SELECT s.seed + s.step * k
+    FROM (
+        SELECT
+            seed_date + seed_time AS seed,
+            CASE frequency
+                WHEN 'daily' THEN INTERVAL '1 day'
+                WHEN 'weekly' THEN INTERVAL '7 days'
+                WHEN 'monthly' THEN INTERVAL '1 month'
+                WHEN 'yearly' THEN INTERVAL '1 year'
+                ELSE INTERVAL '0'
+            END AS step
+    ) s,
+    LATERAL generate_series(
+        CASE frequency
+            WHEN 'daily' THEN greatest(0, floor(extract(epoch FROM from_ts - s.seed) / 86400)::int)
+            WHEN 'weekly' THEN greatest(0, floor(extract(epoch FROM from_ts - s.seed) / 604800)::int)
+            WHEN 'monthly' THEN greatest(0, ((extract(year FROM from_ts) - extract(year FROM s.seed)) * 12
+                + extract(month FROM from_ts) - extract(month FROM s.seed) - 1)::int)
+            WHEN 'yearly' THEN greatest(0, (extract(year FROM from_ts) - extract(year FROM s.seed) - 1)::int)
+            ELSE 0
+        END,
+        CASE frequency
+            WHEN 'daily' THEN floor(extract(epoch FROM to_ts - s.seed) / 86400)::int
+            WHEN 'weekly' THEN floor(extract(epoch FROM to_ts - s.seed) / 604800)::int
+            WHEN 'monthly' THEN ((extract(year FROM to_ts) - extract(year FROM s.seed)) * 12
+                + extract(month FROM to_ts) - extract(month FROM s.seed))::int
+            WHEN 'yearly' THEN (extract(year FROM to_ts) - extract(year FROM s.seed))::int
+            ELSE 0
+        END
+    ) AS k
+    WHERE s.seed + s.step * k BETWEEN from_ts AND to_ts
+$$ LANGUAGE sql IMMUTABLE;
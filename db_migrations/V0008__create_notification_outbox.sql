@@ -0,0 +1,20 @@
+-- Durable queue of notification emails. Producers insert and return at once;
+-- send-notification ?action=drain claims due rows in batches and delivers them.
+-- status: pending -> sending -> sent, or back to pending with a backed-off
+-- next_attempt_at, or failed once attempts are exhausted. A row left in
+-- 'sending' by a crashed worker is reclaimed when its lease (next_attempt_at) expires.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    idempotency_key VARCHAR(255) UNIQUE NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+-- Partial index: the drain only ever scans rows that still need delivery
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_due ON notification_outbox(next_attempt_at)
+    WHERE status IN ('pending', 'sending');
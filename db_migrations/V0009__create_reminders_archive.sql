@@ -0,0 +1,37 @@
+-- Cold storage for reminders that can no longer fire: soft-deleted rows and
+-- one-off reminders whose moment has passed. reminder-archiver moves them here
+-- in batches, so the reminders table and its indexes only grow with live data.
+CREATE TABLE IF NOT EXISTS reminders_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    date DATE NOT NULL,
+    time TIME NOT NULL,
+    frequency VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    archive_reason VARCHAR(20) NOT NULL CHECK (archive_reason IN ('deleted', 'expired'))
+);
+
+-- Back ?include_archived=true lists and the tombstones delta sync reads
+CREATE INDEX IF NOT EXISTS idx_reminders_archive_user_date_time_id ON reminders_archive(user_id, date, time, id);
+CREATE INDEX IF NOT EXISTS idx_reminders_archive_user_archived_at ON reminders_archive(user_id, archived_at, id);
+
+-- Partial index: list pages only ever read live rows
+CREATE INDEX IF NOT EXISTS idx_reminders_live_user_date_time_id ON reminders(user_id, date, time, id)
+    WHERE is_active = true;
+DROP INDEX IF EXISTS idx_reminders_user_date_time_id;
+
+-- Superseded: user_id leads the keyset and delta sync indexes, and no query
+-- filters on date across users
+DROP INDEX IF EXISTS idx_reminders_user_id;
+DROP INDEX IF EXISTS idx_reminders_date;
+
+-- Partial indexes over archival candidates, so each batch finds them without
+-- touching live rows
+CREATE INDEX IF NOT EXISTS idx_reminders_inactive_updated_at ON reminders(updated_at)
+    WHERE is_active = false;
+CREATE INDEX IF NOT EXISTS idx_reminders_spent_once ON reminders((date + time))
+    WHERE is_active = true AND frequency = 'once' AND next_fire_at IS NULL;
@@ -0,0 +1,127 @@
+-- Per-user reminder counts for the dashboard, kept current by triggers so
+-- reading them never scans the user's reminders.
+-- active/inactive count rows still in reminders; the frequency columns count active rows.
+CREATE TABLE IF NOT EXISTS reminder_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id),
+    active INTEGER NOT NULL DEFAULT 0,
+    inactive INTEGER NOT NULL DEFAULT 0,
+    once INTEGER NOT NULL DEFAULT 0,
+    daily INTEGER NOT NULL DEFAULT 0,
+    weekly INTEGER NOT NULL DEFAULT 0,
+    monthly INTEGER NOT NULL DEFAULT 0,
+    yearly INTEGER NOT NULL DEFAULT 0
+);
+
+-- Active reminders by the day of their next occurrence. Being due is a matter
+-- of the clock, so it is kept as day buckets and "due this week" sums at most
+-- seven of them; the dispatcher moving next_fire_at moves a reminder between buckets.
+CREATE TABLE IF NOT EXISTS reminder_stats_days (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    day DATE NOT NULL,
+    reminders INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+-- Statement-level: each write statement folds all its rows into one signed
+-- delta per user and per (user, day) instead of one upsert per row. Rows
+-- whose counted columns did not change cancel out and write nothing.
+CREATE OR REPLACE FUNCTION reminder_stats_apply() RETURNS trigger AS $$
+DECLARE
+    changes TEXT := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT user_id, is_active IS TRUE AS active, frequency, next_fire_at, 1 AS delta FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT user_id, is_active IS TRUE AS active, frequency, next_fire_at, -1 AS delta FROM old_rows'
+        ELSE 'SELECT user_id, is_active IS TRUE AS active, frequency, next_fire_at, 1 AS delta FROM new_rows
+              UNION ALL SELECT user_id, is_active IS TRUE, frequency, next_fire_at, -1 FROM old_rows'
+    END;
+BEGIN
+    EXECUTE format($sql$
+        WITH changes AS (%s), deltas AS (
+            SELECT user_id,
+                coalesce(sum(delta) FILTER (WHERE active), 0) AS active,
+                coalesce(sum(delta) FILTER (WHERE NOT active), 0) AS inactive,
+                coalesce(sum(delta) FILTER (WHERE active AND frequency = 'once'), 0) AS once,
+                coalesce(sum(delta) FILTER (WHERE active AND frequency = 'daily'), 0) AS daily,
+                coalesce(sum(delta) FILTER (WHERE active AND frequency = 'weekly'), 0) AS weekly,
+                coalesce(sum(delta) FILTER (WHERE active AND frequency = 'monthly'), 0) AS monthly,
+                coalesce(sum(delta) FILTER (WHERE active AND frequency = 'yearly'), 0) AS yearly
+            FROM changes
+            GROUP BY user_id
+        )
+        INSERT INTO reminder_stats AS s (user_id, active, inactive, once, daily, weekly, monthly, yearly)
+        SELECT * FROM deltas
+        WHERE (active, inactive, once, daily, weekly, monthly, yearly) <> (0, 0, 0, 0, 0, 0, 0)
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            active = s.active + EXCLUDED.active,
+            inactive = s.inactive + EXCLUDED.inactive,
+            once = s.once + EXCLUDED.once,
+            daily = s.daily + EXCLUDED.daily,
+            weekly = s.weekly + EXCLUDED.weekly,
+            monthly = s.monthly + EXCLUDED.monthly,
+            yearly = s.yearly + EXCLUDED.yearly
+    $sql$, changes);
+
+    EXECUTE format($sql$
+        WITH changes AS (%s)
+        INSERT INTO reminder_stats_days AS d (user_id, day, reminders)
+        SELECT user_id, next_fire_at::date, sum(delta)
+        FROM changes
+        WHERE active AND next_fire_at IS NOT NULL
+        GROUP BY 1, 2
+        HAVING sum(delta) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (user_id, day) DO UPDATE SET reminders = d.reminders + EXCLUDED.reminders
+    $sql$, changes);
+
+    -- Emptied buckets are dropped so the table only holds days something is due on
+    EXECUTE format($sql$
+        DELETE FROM reminder_stats_days d
+        USING (SELECT DISTINCT user_id FROM (%s) c WHERE active AND next_fire_at IS NOT NULL) c
+        WHERE d.user_id = c.user_id AND d.reminders = 0
+    $sql$, changes);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event
+DROP TRIGGER IF EXISTS reminder_stats_insert ON reminders;
+CREATE TRIGGER reminder_stats_insert AFTER INSERT ON reminders
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reminder_stats_apply();
+DROP TRIGGER IF EXISTS reminder_stats_update ON reminders;
+CREATE TRIGGER reminder_stats_update AFTER UPDATE ON reminders
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reminder_stats_apply();
+DROP TRIGGER IF EXISTS reminder_stats_delete ON reminders;
+CREATE TRIGGER reminder_stats_delete AFTER DELETE ON reminders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION reminder_stats_apply();
+
+-- Recount one user's statistics, or everyone's with NULL, from the reminders
+-- table. Used for the initial backfill and by reminder-stats-check to repair drift.
+CREATE OR REPLACE FUNCTION reminder_stats_rebuild(only_user INTEGER DEFAULT NULL) RETURNS VOID AS $$
+    DELETE FROM reminder_stats WHERE only_user IS NULL OR user_id = only_user;
+    DELETE FROM reminder_stats_days WHERE only_user IS NULL OR user_id = only_user;
+
+    INSERT INTO reminder_stats (user_id, active, inactive, once, daily, weekly, monthly, yearly)
+    SELECT user_id,
+        count(*) FILTER (WHERE is_active IS TRUE),
+        count(*) FILTER (WHERE is_active IS NOT TRUE),
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'once'),
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'daily'),
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'weekly'),
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'monthly'),
+        count(*) FILTER (WHERE is_active IS TRUE AND frequency = 'yearly')
+    FROM reminders
+    WHERE only_user IS NULL OR user_id = only_user
+    GROUP BY user_id;
+
+    INSERT INTO reminder_stats_days (user_id, day, reminders)
+    SELECT user_id, next_fire_at::date, count(*)
+    FROM reminders
+    WHERE is_active IS TRUE AND next_fire_at IS NOT NULL AND (only_user IS NULL OR user_id = only_user)
+    GROUP BY 1, 2;
+$$ LANGUAGE sql;
+
+SELECT reminder_stats_rebuild();
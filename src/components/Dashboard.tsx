@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import ReminderCard from './ReminderCard';
 import ReminderForm from './ReminderForm';
 import Icon from '@/components/ui/icon';
@@ -18,16 +18,43 @@ interface DashboardProps {
   onAddReminder: (reminder: Omit<Reminder, 'id'>) => void;
   onEditReminder: (id: string, reminder: Omit<Reminder, 'id'>) => void;
   onDeleteReminder: (id: string) => void;
+  onSearch: (query: string) => Promise<Reminder[]>;
 }
 
-export default function Dashboard({ reminders, onAddReminder, onEditReminder, onDeleteReminder }: DashboardProps) {
+const SEARCH_DEBOUNCE_MS = 250;
+
+export default function Dashboard({ reminders, onAddReminder, onEditReminder, onDeleteReminder, onSearch }: DashboardProps) {
   const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState<Reminder[] | null>(null);
   const [editingReminder, setEditingReminder] = useState<Reminder | null>(null);
 
-  const filteredReminders = reminders.filter(reminder =>
-    reminder.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-    reminder.description.toLowerCase().includes(searchQuery.toLowerCase())
-  );
+  // Search runs on the server against the full-text index; re-run it when
+  // the local list changes so edits and deletions show up in the results
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (!query) {
+      setSearchResults(null);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      onSearch(query)
+        .then(results => {
+          if (!cancelled) setSearchResults(results);
+        })
+        .catch(() => {
+          if (!cancelled) setSearchResults([]);
+        });
+    }, SEARCH_DEBOUNCE_MS);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, reminders, onSearch]);
+
+  const filteredReminders = searchQuery.trim() && searchResults ? searchResults : reminders;
 
   const handleEdit = (reminder: Reminder) => {
     setEditingReminder(reminder);
@@ -1,8 +1,11 @@
+// Set VITE_API_BASE_URL (e.g. http://localhost:8000) to use backend/server.py instead of the cloud functions
+const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'https://functions.poehali.dev';
+
 const API_URLS = {
-  register: 'https://functions.poehali.dev/7a7f18ca-7e12-45c8-adfe-7761f46ee2ba',
-  login: 'https://functions.poehali.dev/42fa3010-308e-44ea-98b5-54882a4d756b',
-  reminders: 'https://functions.poehali.dev/74878efb-7718-4c5a-b4a2-ac5966fb7d7b',
-  sendNotification: 'https://functions.poehali.dev/a48b0516-943b-4a11-8cdf-52b3aeee9481',
+  register: `${API_BASE_URL}/7a7f18ca-7e12-45c8-adfe-7761f46ee2ba`,
+  login: `${API_BASE_URL}/42fa3010-308e-44ea-98b5-54882a4d756b`,
+  reminders: `${API_BASE_URL}/74878efb-7718-4c5a-b4a2-ac5966fb7d7b`,
+  sendNotification: `${API_BASE_URL}/a48b0516-943b-4a11-8cdf-52b3aeee9481`,
 };
 
 export interface User {
@@ -29,6 +32,45 @@ export interface Reminder {
   updated_at?: string;
 }
 
+export interface ReminderPage {
+  reminders: Reminder[];
+  next_cursor: string | null;
+}
+
+export interface ReminderChanges {
+  reminders: Reminder[];
+  watermark: string;
+  has_more: boolean;
+}
+
+export interface ReminderOccurrence {
+  reminder_id: number;
+  title: string;
+  frequency: 'once' | 'daily' | 'weekly' | 'monthly' | 'yearly';
+  date: string;
+  time: string;
+}
+
+export interface OccurrenceRange {
+  occurrences: ReminderOccurrence[];
+  truncated: boolean;
+}
+
+export interface ReminderStats {
+  active: number;
+  inactive: number;
+  by_frequency: Record<Reminder['frequency'], number>;
+  due_today: number;
+  due_this_week: number;
+}
+
+export interface ReminderListParams {
+  search?: string;
+  limit?: number;
+  after?: string;
+  include_archived?: boolean;
+}
+
 export interface ReminderCreate {
   title: string;
   description?: string;
@@ -46,6 +88,25 @@ export interface ReminderUpdate {
   is_active?: boolean;
 }
 
+export interface BulkReminderRequest {
+  creates?: ReminderCreate[];
+  updates?: (ReminderUpdate & { id: number })[];
+  deletes?: number[];
+}
+
+export interface BulkItemOutcome {
+  index: number;
+  status: 'created' | 'updated' | 'deleted' | 'not_found' | 'invalid';
+  id?: number;
+  error?: string;
+}
+
+export interface BulkReminderResponse {
+  creates: BulkItemOutcome[];
+  updates: BulkItemOutcome[];
+  deletes: BulkItemOutcome[];
+}
+
 class ApiError extends Error {
   constructor(public status: number, message: string) {
     super(message);
@@ -80,10 +141,13 @@ export const api = {
     return handleResponse<AuthResponse>(response);
   },
 
-  async getReminders(token: string, search?: string): Promise<Reminder[]> {
-    const url = search 
-      ? `${API_URLS.reminders}?search=${encodeURIComponent(search)}`
-      : API_URLS.reminders;
+  async getReminders(token: string, params: ReminderListParams = {}): Promise<ReminderPage> {
+    const query = new URLSearchParams();
+    if (params.search) query.set('search', params.search);
+    if (params.limit) query.set('limit', params.limit.toString());
+    if (params.after) query.set('after', params.after);
+    if (params.include_archived) query.set('include_archived', 'true');
+    const url = query.toString() ? `${API_URLS.reminders}?${query}` : API_URLS.reminders;
     
     const response = await fetch(url, {
       method: 'GET',
@@ -92,7 +156,73 @@ export const api = {
         'X-Auth-Token': token,
       },
     });
-    return handleResponse<Reminder[]>(response);
+    return handleResponse<ReminderPage>(response);
+  },
+
+  async getAllReminders(token: string, search?: string): Promise<Reminder[]> {
+    const reminders: Reminder[] = [];
+    let after: string | undefined;
+    do {
+      const page = await api.getReminders(token, { search, after });
+      reminders.push(...page.reminders);
+      after = page.next_cursor ?? undefined;
+    } while (after);
+    return reminders;
+  },
+
+  async syncReminders(token: string, since: string, limit?: number): Promise<ReminderChanges> {
+    const query = new URLSearchParams({ since });
+    if (limit) query.set('limit', limit.toString());
+    
+    const response = await fetch(`${API_URLS.reminders}?${query}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Auth-Token': token,
+      },
+    });
+    return handleResponse<ReminderChanges>(response);
+  },
+
+  async getOccurrences(token: string, from: string, to: string, limit?: number): Promise<OccurrenceRange> {
+    const query = new URLSearchParams({ action: 'occurrences', from, to });
+    if (limit) query.set('limit', limit.toString());
+    
+    const response = await fetch(`${API_URLS.reminders}?${query}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Auth-Token': token,
+      },
+    });
+    return handleResponse<OccurrenceRange>(response);
+  },
+
+  async getReminderStats(token: string): Promise<ReminderStats> {
+    const response = await fetch(`${API_URLS.reminders}?action=stats`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Auth-Token': token,
+      },
+    });
+    return handleResponse<ReminderStats>(response);
+  },
+
+  async exportReminders(token: string, format: 'ics' | 'csv' = 'ics'): Promise<Blob> {
+    const query = new URLSearchParams({ action: 'export', format });
+
+    const response = await fetch(`${API_URLS.reminders}?${query}`, {
+      method: 'GET',
+      headers: {
+        'X-Auth-Token': token,
+      },
+    });
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Request failed' }));
+      throw new ApiError(response.status, error.error || 'Request failed');
+    }
+    return response.blob();
   },
 
   async createReminder(token: string, data: ReminderCreate): Promise<Reminder> {
@@ -130,6 +260,18 @@ export const api = {
     await handleResponse<{ message: string }>(response);
   },
 
+  async bulkReminders(token: string, data: BulkReminderRequest): Promise<BulkReminderResponse> {
+    const response = await fetch(`${API_URLS.reminders}?action=bulk`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Auth-Token': token,
+      },
+      body: JSON.stringify(data),
+    });
+    return handleResponse<BulkReminderResponse>(response);
+  },
+
   async sendNotification(token: string, data: {
     to_email: string;
     reminder_title: string;
@@ -145,7 +287,7 @@ export const api = {
       },
       body: JSON.stringify(data),
     });
-    await handleResponse<{ message: string }>(response);
+    await handleResponse<{ id: number; status: 'queued' | 'duplicate'; message: string }>(response);
   },
 };
 
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useCallback } from 'react';
 import Header from '../components/Header';
 import HeroSection from '../components/HeroSection';
 import AuthForm from '../components/AuthForm';
@@ -40,7 +40,7 @@ const Index = () => {
   const loadReminders = async (authToken: string) => {
     setIsLoading(true);
     try {
-      const data = await api.getReminders(authToken);
+      const data = await api.getAllReminders(authToken);
       setReminders(data.map(r => ({
         id: r.id.toString(),
         title: r.title,
@@ -62,6 +62,20 @@ const Index = () => {
     }
   };
 
+  const handleSearchReminders = useCallback(async (query: string): Promise<Reminder[]> => {
+    if (!token) return [];
+    
+    const page = await api.getReminders(token, { search: query });
+    return page.reminders.map(r => ({
+      id: r.id.toString(),
+      title: r.title,
+      description: r.description || '',
+      date: r.date,
+      time: r.time,
+      frequency: r.frequency
+    }));
+  }, [token]);
+
   const handleLogin = async (email: string, password: string) => {
     setIsLoading(true);
     try {
@@ -267,6 +281,7 @@ const Index = () => {
           onAddReminder={handleAddReminder}
           onEditReminder={handleEditReminder}
           onDeleteReminder={handleDeleteReminder}
+          onSearch={handleSearchReminders}
         />
       )}
     </div>